@@ -3,13 +3,37 @@
 :source: https://github.com/Kanasaru/resa
 :license: CC-BY-SA-4.0
 """
+import argparse
 import logging.config
-import src
-import src.start
+import os
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Resa')
+    parser.add_argument('--build-bundle', nargs='?', const='', metavar='FILE',
+                        help='builds the asset bundle headless and exits')
+    parser.add_argument('--benchmark', nargs='*', metavar='NAME',
+                        help='runs the given or all render benchmarks headless and exits')
+    args = parser.parse_args()
+
     logging.config.fileConfig('data/conf/logging.conf')
+
+    if args.build_bundle is not None:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        import src.build
+        src.build.build_bundle(args.build_bundle or None)
+        return
+
+    if args.benchmark is not None:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        import src.benchmark
+        src.benchmark.run(args.benchmark)
+        return
+
+    # imported after the logging setup to log the asset loading at import
+    import src.start
     start = src.start.Start()
 
 
@@ -0,0 +1,165 @@
+""" This module provides headless render benchmarks
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import logging
+import random
+import time
+import pygame
+from src.handler import RESA_CH, RESA_AH
+import src.ui.backend
+import src.ui.display
+from src.world.camera import Camera
+from src.world.generator import World
+from src.world.map import Map
+
+VIEW_SIZE = (1920, 1080)
+
+
+def measure(func, frames: int) -> float:
+    """ Calls a function once per frame and returns the mean time of a frame.
+
+    :param func: function that renders one frame
+    :param frames: number of frames
+    :return: milliseconds per frame
+    """
+    func()
+    start = time.perf_counter()
+    for frame in range(frames):
+        func()
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def benchmark_blits(entities: int = 5000, frames: int = 200) -> dict:
+    """ Compares drawing the visible entities one blit at a time with the batched and cached blit sequence
+        of World.draw. A second run clips all blits away, so only the per-frame Python overhead is left.
+
+    :param entities: number of visible entities
+    :param frames: number of measured frames
+    :return: milliseconds per frame by name
+    """
+    surface = pygame.display.get_surface()
+    atlas = RESA_AH.get(RESA_CH.grid_zoom)
+    images = [atlas.image_by_index('Trees', index, 2) for index in range(3)]
+
+    world = World(132, 132)
+    camera = Camera(VIEW_SIZE, world.rect.size)
+    randomizer = random.Random(0)
+    for key in range(entities):
+        sprite = pygame.sprite.Sprite()
+        sprite.image = images[key % len(images)]
+        sprite.rect = sprite.image.get_rect(topleft=(randomizer.randrange(VIEW_SIZE[0]),
+                                                     randomizer.randrange(VIEW_SIZE[1])))
+        world.dynamic.insert(sprite, sprite.rect)
+
+    def single() -> None:
+        for sprite in world.dynamic.query(camera.rect):
+            surface.blit(sprite.image, camera.apply(sprite.rect))
+
+    def batched() -> None:
+        world.draw(surface, camera)
+
+    def scrolled() -> None:
+        # a moving camera invalidates the cached sequence every frame
+        camera.rect.x ^= 1
+        world.draw(surface, camera)
+
+    results = {}
+    for clip in (None, pygame.Rect(0, 0, 0, 0)):
+        surface.set_clip(clip)
+        suffix = '' if clip is None else ' (overhead)'
+        results[f'single blits{suffix}'] = measure(single, frames)
+        results[f'batched{suffix}'] = measure(batched, frames)
+        results[f'batched, scrolling{suffix}'] = measure(scrolled, frames)
+    surface.set_clip(None)
+
+    return results
+
+
+def benchmark_scale(scales: tuple = (1.0, .75, .5), frames: int = 100) -> dict:
+    """ Compares the frame times of a generated map at different render scales. The camera scrolls, so
+        every frame is rendered completely and scaled up to the view.
+
+    :param scales: render scales to compare
+    :param frames: number of measured frames per scale
+    :return: milliseconds per frame by name
+    """
+    surface = pygame.display.get_surface()
+    random.seed(0)
+    game_map = Map(VIEW_SIZE, (0, 0))
+    game_map.build_world()
+    step = [RESA_CH.map_pace]
+
+    def scrolled() -> None:
+        if game_map.camera.move(step[0], step[0] // 2) == (0, 0):
+            step[0] = -step[0]
+        game_map.render()
+        surface.blit(game_map.get_surface(), game_map.map_shift)
+
+    results = {}
+    for scale in sorted(set(scales) | {RESA_CH.render_scale}, reverse=True):
+        game_map.set_render_scale(scale)
+        results[f'render scale {scale:.0%}, scrolling'] = measure(scrolled, frames)
+
+    return results
+
+
+def benchmark_backend(frames: int = 100) -> dict:
+    """ Compares the frame times of a generated map composed by each render backend. The display gets an
+        SDL renderer for both, so the software path is measured with the same upload to the window.
+
+    :param frames: number of measured frames per backend
+    :return: milliseconds per frame by name
+    """
+    src.ui.display.set_mode(VIEW_SIZE, renderer=True)
+
+    results = {}
+    for name in src.ui.backend.BACKENDS:
+        backend = src.ui.backend.create(name)
+        if backend.name != name:
+            continue
+        random.seed(0)
+        game_map = Map(VIEW_SIZE, (0, 0), backend=backend)
+        game_map.build_world()
+        surface = backend.surface()
+        step = [RESA_CH.map_pace]
+
+        def scrolled() -> None:
+            if game_map.camera.move(step[0], step[0] // 2) == (0, 0):
+                step[0] = -step[0]
+            game_map.render()
+            backend.blit_map(surface, game_map.get_surface(), pygame.Rect((0, 0), VIEW_SIZE))
+            backend.present()
+
+        results[f'{name} backend, scrolling'] = measure(scrolled, frames)
+
+    src.ui.display.set_mode(VIEW_SIZE)
+
+    return results
+
+
+BENCHMARKS = {
+    'blits': benchmark_blits,
+    'scale': benchmark_scale,
+    'backend': benchmark_backend,
+}
+
+
+def run(names: list[str] = None) -> None:
+    """ Runs the given benchmarks, or all, and prints their results.
+
+    :param names: names of the benchmarks
+    :return: None
+    """
+    src.ui.display.set_mode(VIEW_SIZE)
+
+    for name in names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            logging.error(f'Unknown benchmark {name}, choose from: {", ".join(BENCHMARKS)}')
+            continue
+        results = BENCHMARKS[name]()
+        for desc, value in results.items():
+            print(f'{name:8} {desc:34} {value:8.3f} ms/frame {1000 / value:8.1f} fps')
+            logging.info(f'Benchmark {name}: {desc} {value:.3f} ms/frame, {1000 / value:.1f} fps')
@@ -0,0 +1,57 @@
+""" This module provides the headless build of the asset bundle
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import logging
+import os
+import src.handler.pixelformat as pixelformat
+from src.handler import RESA_CH, RESA_SSH, RESA_AH, RESA_BUNDLE
+from src.handler.bundle import AssetBundle, BundleBuilder
+
+IMAGE_PATH = 'res/images'
+
+
+def build_bundle(filename: str = None) -> int:
+    """ Builds the asset bundle from the sprite sheets of sprites.ini, the atlas of the configured
+        grid zoom, the images and sounds and the island templates.
+
+    :param filename: filename of the bundle, configured bundle file if None
+    :return: size of the bundle in bytes
+    """
+    if filename is None:
+        filename = RESA_CH.bundle_file
+
+    # build from the sources only, not from an existing bundle
+    RESA_BUNDLE.close()
+    builder = BundleBuilder()
+
+    for sheet in RESA_SSH.sheets.values():
+        builder.add_image(sheet.bundle_name, sheet.sheet, sheet.bundle_stamp())
+
+    RESA_AH.release_sheets = False
+    atlas = RESA_AH.get(RESA_CH.grid_zoom)
+    stamp = atlas.bundle_stamp(RESA_SSH, RESA_CH.atlas_widths, atlas.max_width)
+    builder.add_image(atlas.bundle_name, atlas.image, stamp, atlas.meta)
+
+    for file in sorted(os.listdir(IMAGE_PATH)):
+        if file.endswith('.png'):
+            path = f'{IMAGE_PATH}/{file}'
+            builder.add_image(f'image:{path}', RESA_BUNDLE.load_image(path, pixelformat.OPAQUE),
+                              AssetBundle.stamp(path, pixelformat.OPAQUE))
+
+    for file in sorted(os.listdir(RESA_CH.sounds)):
+        if file.endswith('.wav') or file.endswith('.mp3'):
+            path = f'{RESA_CH.sounds}/{file}'
+            builder.add_sound(f'sound:{path}', RESA_BUNDLE.load_sound(path), AssetBundle.stamp(path))
+
+    for file in sorted(os.listdir(RESA_CH.islands)):
+        if file.endswith('.island'):
+            path = f'{RESA_CH.islands}/{file}'
+            builder.add_data(f'data:{path}', RESA_BUNDLE.load_bytes(path), AssetBundle.stamp(path))
+
+    size = builder.write(filename)
+    logging.info(f'Built asset bundle with {len(builder.entries)} assets')
+
+    return size
@@ -8,11 +8,14 @@ import src.locales as locales
 from datetime import datetime
 import pygame
 import logging
-from src.handler import RESA_CH, RESA_SSH, RESA_GDH, RESA_GSH, RESA_SH, RESA_MH, RESA_DH, RESA_EH
+from src.handler import RESA_CH, RESA_SSH, RESA_GDH, RESA_GSH, RESA_SH, RESA_MH, RESA_DH, RESA_EH, RESA_AC
+from src.handler.idle import IdleWaiter
+from src.handler.quality import QualityGovernor
 from src.ui.screens import DebugScreen, GamePausedScreen
 from src.ui.panels import GamePanel
 from src.world.map import Map
 from src.ui.form import MessageHandler
+import src.ui.backend
 from src.world.entities.building import Building
 
 
@@ -30,17 +33,32 @@ class Game(object):
 
         # set timers and clocks
         self.clock = pygame.time.Clock()
+        self.waiter = IdleWaiter(self.clock, RESA_CH.fps, RESA_CH.idle_timeout, RESA_CH.idle_wait)
 
-        # screen settings, build screens and panels
-        self.surface = pygame.display.get_surface()
+        # screen settings, build screens and panels, the interfaces are rendered on the backend surface
+        self.backend = src.ui.backend.create(RESA_CH.render_backend)
+        self.surface = self.backend.surface()
         self.border_thickness = RESA_CH.map_border_thickness
         self.border_color = RESA_CH.COLOR_WHITE
+        # dirty rect updates fall back to a full flip on the first frame and after display changes
+        self.full_update = True
+        self.display_size = self.surface.get_size()
         # debug screen
         self.debug_screen = DebugScreen()
         self.debug_screen.add(locales.get('info_fps'), self.clock.get_fps)
         self.debug_screen.add(locales.get('info_version'), lambda: RESA_CH.version)
         self.debug_screen.add(locales.get('info_date'), lambda: datetime.now().strftime("%A, %d. %B %Y"))
         self.debug_screen.add(locales.get('info_ingame_time'), RESA_GDH.get_game_time)
+        self.debug_screen.add(locales.get('info_sprite_cache'), lambda: RESA_SSH.cache)
+        self.debug_screen.add(locales.get('info_entities'),
+                              lambda: f'{self.map.world.drawn} / {self.map.world.total}')
+        # quality governor, steps the quality by the measured frame time
+        self.governor = QualityGovernor(RESA_CH.quality_levels, 1000 / RESA_CH.fps, RESA_CH.quality_min,
+                                        RESA_CH.quality_max, RESA_CH.quality_window, RESA_CH.quality_cooldown)
+        if RESA_CH.quality_governor:
+            self.debug_screen.add(locales.get('info_quality'), lambda: self.governor)
+        if RESA_DH.blit_audit.enabled:
+            self.debug_screen.add(locales.get('info_blit_audit'), lambda: RESA_DH.blit_audit)
         # game panel
         self.game_panel = GamePanel(RESA_SSH, RESA_CH.sp_menu_btn_key)
         # messages
@@ -51,11 +69,17 @@ class Game(object):
             (0, self.game_panel.rect.height),
             (pygame.display.get_surface().get_width(),
              pygame.display.get_surface().get_height() - self.game_panel.rect.height)))
+        # map dimmed by the pause screen, composed once and kept while the game is paused
+        self.paused_frame = None
 
         # loading map
         self.map = None
         self.map_shift = (self.border_thickness, self.game_panel.rect.height + self.border_thickness)
         self.load_map()
+        if RESA_CH.quality_governor:
+            self.map.apply_quality(self.governor.settings)
+            self.map.set_quality_scales(level['render_scale'] for level in
+                                        self.governor.levels[self.governor.min_level:self.governor.max_level + 1])
 
         # timer
         pygame.time.set_timer(RESA_EH.RESA_AUTOSAVE_EVENT, RESA_CH.autosave_interval)
@@ -71,7 +95,9 @@ class Game(object):
         # map instance with shrinked surface size to provide border and room for game panel
         surface_width = pygame.display.get_surface().get_width() - self.border_thickness * 2
         surface_height = pygame.display.get_surface().get_height() - self.game_panel.rect.height - self.border_thickness * 2
-        self.map = Map((surface_width, surface_height), self.map_shift)
+        # the display is already scaled if the render scale applies to the whole display
+        render_scale = 1.0 if RESA_CH.render_scale_ui else RESA_CH.render_scale
+        self.map = Map((surface_width, surface_height), self.map_shift, render_scale, self.backend)
 
         if RESA_GSH.map_load:
             # load world from file
@@ -93,26 +119,35 @@ class Game(object):
         RESA_MH.start(RESA_CH.volume)
 
         while not RESA_GSH.exit_game:
-            self.clock.tick(RESA_CH.fps)
-            self.handle_events()
+            # a paused game is only rendered again after input or while info boxes move
+            events = self.waiter.events(not RESA_GSH.pause_game or self.messages.is_animating())
+            if events is None:
+                continue
+            self.handle_events(events)
             self.run_logic()
             self.render()
 
-    def handle_events(self) -> None:
+    def handle_events(self, events: list[pygame.event.Event]) -> None:
         """ Handles all in-game events
 
+        :param events: events of the frame
         :return: None
         """
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 self.leave_game()
+            elif event.type in (pygame.VIDEORESIZE, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.full_update = True
             elif event.type == pygame.KEYUP:
                 if event.key == pygame.K_F2:
                     self.take_screenshot()
                 elif event.key == pygame.K_F3:
                     RESA_DH.toggle()
+                    self.full_update = True
                 elif event.key == pygame.K_p:
                     RESA_GSH.pause_game = not RESA_GSH.pause_game
+                    self.full_update = True
+                    self.governor.reset()
                     RESA_GDH.pause_ingame_time()
                     RESA_MH.pause()
                 elif event.key == pygame.K_PLUS:
@@ -129,8 +164,7 @@ class Game(object):
             elif event.type == pygame.MOUSEBUTTONUP:
                 if event.button == 1:
                     # cursor in map?
-                    cursor_x = event.pos[0] - self.map.rect.x - self.map_shift[0]
-                    cursor_y = event.pos[1] - self.map.rect.y - self.map_shift[1]
+                    cursor_x, cursor_y = self.map.to_world(event.pos)
                     if cursor_x >= 0 and cursor_y >= 0:
                         cursor_on_map = True
                     else:
@@ -183,8 +217,17 @@ class Game(object):
                     else:
                         print('build not possible')
 
+                # advance the animations by the elapsed game time
+                RESA_AC.update(RESA_GDH.game_time)
                 # update map
                 self.map.run_logic()
+                # adapt the quality to the work time of the last frame
+                if RESA_CH.quality_governor and self.governor.update(self.clock.get_rawtime()):
+                    self.map.apply_quality(self.governor.settings)
+                # prepare the terrain of the other quality levels in the spare time of the last frame
+                if RESA_CH.quality_governor:
+                    spare = 1000 / RESA_CH.fps - self.clock.get_rawtime()
+                    self.map.warm(min(RESA_CH.terrain_warm_time, spare / 2))
             # update game panel
             self.game_panel.run_logic()
 
@@ -199,12 +242,18 @@ class Game(object):
 
         :return: None
         """
-        # fill surface, will be the border color
-        self.surface.fill(self.border_color)
-
-        # render the map and blit its surface to main surface with border thickness
-        self.map.render()
-        pygame.Surface.blit(self.surface, self.map.get_surface(), self.map_shift)
+        if not RESA_GSH.pause_game:
+            self.paused_frame = None
+            self.render_map()
+        elif self.paused_frame is None or self.paused_frame.get_size() != self.surface.get_size():
+            # freeze the map under the pause screen, only the interfaces are rendered over it while paused
+            self.render_map()
+            self.backend.flatten(self.surface)
+            self.paused_screen.render(self.surface)
+            self.paused_frame = self.surface.copy()
+            self.full_update = True
+        else:
+            self.surface.blit(self.paused_frame, (0, 0))
 
         # render message and info boxes
         self.messages.render(self.surface)
@@ -216,12 +265,48 @@ class Game(object):
         if RESA_DH:
             self.debug_screen.render(self.surface)
 
-        # render pause screen
+        # display surface
+        self.update_display()
+
+    def render_map(self) -> None:
+        """ Renders the map into the border of the surface
+
+        :return: None
+        """
+        # fill surface, will be the border color
+        self.surface.fill(self.border_color)
+
+        # render the map and blit its surface to main surface with border thickness
+        self.map.render()
+        RESA_DH.blit_audit.check(self.map.get_surface(), self.surface, 'Game.render')
+        self.backend.blit_map(self.surface, self.map.get_surface(), pygame.Rect(self.map_shift, self.map.screen_size))
+
+    def update_display(self) -> None:
+        """ Updates only the changed areas of the display or flips it completely after scrolling,
+            display changes or if dirty rects are disabled.
+
+        :return: None
+        """
+        # collect the changes of all parts, so none of them reports old changes later
+        map_rects = self.map.dirty_rects()
+        rects = self.game_panel.dirty_rects() + self.messages.dirty_rects()
+        debug_rects = self.debug_screen.dirty_rects()
+        self.paused_screen.dirty_rects()
+        if RESA_DH:
+            rects += debug_rects
         if RESA_GSH.pause_game:
-            self.paused_screen.render(self.surface)
+            # the frozen map is shown completely after pausing, it does not change afterwards
+            map_rects = []
 
-        # display surface
-        pygame.display.flip()
+        if self.surface.get_size() != self.display_size:
+            self.display_size = self.surface.get_size()
+            self.full_update = True
+
+        if not RESA_CH.dirty_rects or self.full_update or map_rects is None:
+            self.full_update = False
+            self.backend.present()
+        elif map_rects or rects:
+            self.backend.present(map_rects + rects)
 
     def take_screenshot(self) -> None:
         """ Saves the current screen as an image.
@@ -230,7 +315,7 @@ class Game(object):
         """
         RESA_SH.play('screenshot')
         filename = f'{RESA_CH.screenshot_path}screenshot_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.jpeg'
-        pygame.image.save(pygame.display.get_surface(), filename)
+        pygame.image.save(self.backend.snapshot(), filename)
         self.messages.info(f"{locales.get('info_screenshot')}: {filename}")
         logging.info('Took screenshot')
 
@@ -292,38 +377,35 @@ class Game(object):
             # delete entities and place building
             # 1x1
             if x == y == 1:
-                self.map.world.grid_fields[RESA_GSH.place_on.key].sprite = None
+                self.map.world.set_sprite(RESA_GSH.place_on.key, None)
                 self.map.world.grid_fields[RESA_GSH.place_on.key].building = True
                 raw_field = self.map.world.grid_fields[RESA_GSH.place_on.key]
-                new_building = Building(raw_field.rect.midbottom,
-                                        pygame.image.load('res/sprites/entities/build_3x3_test.png').convert(), 1)
-                self.map.world.grid_fields[RESA_GSH.place_on.key].sprite = new_building
+                new_building = Building(raw_field.rect.midbottom, 1)
+                self.map.world.set_sprite(RESA_GSH.place_on.key, new_building)
             # 2x2
             elif x == y == 2:
-                self.map.world.grid_fields[RESA_GSH.place_on.key].sprite = None
+                self.map.world.set_sprite(RESA_GSH.place_on.key, None)
                 self.map.world.grid_fields[RESA_GSH.place_on.key].building = True
-                self.map.world.grid_fields[neighbors.top].sprite = None
+                self.map.world.set_sprite(neighbors.top, None)
                 self.map.world.grid_fields[neighbors.top].building = True
-                self.map.world.grid_fields[neighbors.topleft].sprite = None
+                self.map.world.set_sprite(neighbors.topleft, None)
                 self.map.world.grid_fields[neighbors.topleft].building = True
-                self.map.world.grid_fields[neighbors.topright].sprite = None
+                self.map.world.set_sprite(neighbors.topright, None)
                 self.map.world.grid_fields[neighbors.topright].building = True
 
                 raw_field = self.map.world.grid_fields[RESA_GSH.place_on.key]
-                new_building = Building(raw_field.rect.midbottom,
-                                        pygame.image.load('res/sprites/entities/build_3x3_test.png').convert(), 2)
-                self.map.world.grid_fields[RESA_GSH.place_on.key].sprite = new_building
+                new_building = Building(raw_field.rect.midbottom, 2)
+                self.map.world.set_sprite(RESA_GSH.place_on.key, new_building)
             # 3x3
             elif x == y == 3:
-                self.map.world.grid_fields[RESA_GSH.place_on.key].sprite = None
+                self.map.world.set_sprite(RESA_GSH.place_on.key, None)
                 for rawval in neighbors.all:
-                    self.map.world.grid_fields[rawval].sprite = None
+                    self.map.world.set_sprite(rawval, None)
                     self.map.world.grid_fields[rawval].building = True
 
                 raw_field = self.map.world.grid_fields[neighbors.bottom]
-                new_building = Building(raw_field.rect.midbottom,
-                                        pygame.image.load('res/sprites/entities/build_3x3_test.png').convert(), 3)
-                self.map.world.grid_fields[RESA_GSH.place_on.key].sprite = new_building
+                new_building = Building(raw_field.rect.midbottom, 3)
+                self.map.world.set_sprite(RESA_GSH.place_on.key, new_building)
 
         # reset state
         RESA_GSH.place = False
@@ -1,5 +1,12 @@
 from src.handler.event import EventHandler
 from src.handler.spritesheet import SpriteSheetHandler, SpriteSheet
+from src.handler.atlas import AtlasHandler
+from src.handler.assetcache import AssetCache
+from src.handler.bundle import AssetBundle
+from src.handler.frameset import FrameSetHandler
+from src.handler.animation import AnimationClock
+from src.handler.loader import AssetLoader
+from src.handler.font import FontHandler
 from src.handler.sound import SoundHandler
 from src.handler.music import MusicHandler
 from src.handler.gamedata import GameDataHandler, Settings
@@ -18,14 +25,32 @@ STD_COLOR_KEY = (1, 0, 0)
 PATH_SOUNDS = RESA_CH.sounds
 PATH_MUSIC = RESA_CH.bg_music
 
+""" AssetLoader """
+RESA_AL = AssetLoader(RESA_CH.loader_threads or None)
+
+""" AssetBundle """
+RESA_BUNDLE = AssetBundle(RESA_CH.bundle_file)
+RESA_BUNDLE.open()
+
 """ SpriteSheetHandler """
-RESA_SSH = SpriteSheetHandler()
+RESA_SSH = SpriteSheetHandler(RESA_CH.sprite_cache_size * 1024 * 1024,
+                              AssetCache(RESA_CH.asset_cache_path) if RESA_CH.asset_cache else None,
+                              RESA_BUNDLE)
 RESA_SSH.add(SpriteSheet(RESA_CH.sp_menu_btn_key, RESA_CH.sp_menu_btn, RESA_CH.sp_menu_btn_size, STD_COLOR_KEY))
 RESA_SSH.add(SpriteSheet(RESA_CH.sp_menu_swt_key, RESA_CH.sp_menu_swt, RESA_CH.sp_menu_swt_size, STD_COLOR_KEY))
 for key, value in RESA_CH.sp_world.items():
-    sheet = SpriteSheet(key, value[0], value[1])
-    sheet.colorkey = None
-    RESA_SSH.add(sheet)
+    RESA_SSH.add(SpriteSheet(key, value[0], value[1], pixel_format=value[2]))
+RESA_AL.submit(f'sheet {RESA_CH.sp_menu_btn_key}', RESA_SSH.get(RESA_CH.sp_menu_btn_key).load)
+RESA_AL.submit(f'sheet {RESA_CH.sp_menu_swt_key}', RESA_SSH.get(RESA_CH.sp_menu_swt_key).load)
+
+""" AtlasHandler """
+RESA_AH = AtlasHandler(RESA_SSH, RESA_CH.atlas_widths, RESA_CH.release_sheets)
+
+""" FrameSetHandler """
+RESA_FSH = FrameSetHandler(RESA_AH)
+
+""" AnimationClock """
+RESA_AC = AnimationClock()
 
 """ GameDataHandler """
 RESA_GDH = GameDataHandler()
@@ -34,13 +59,21 @@ RESA_GDH.game_time_speed = RESA_CH.game_speed
 """ GameStateHandler """
 RESA_GSH = GameStateHandler()
 
+""" FontHandler """
+RESA_FH = FontHandler()
+RESA_FH.load(False, (RESA_CH.std_font_size, RESA_CH.msg_font_size, 13), RESA_AL)
+RESA_FH.load(None, (RESA_CH.msg_font_size,), RESA_AL)
+
 """ SoundHandler """
-RESA_SH = SoundHandler(PATH_SOUNDS)
+RESA_SH = SoundHandler(PATH_SOUNDS, loader=RESA_AL, bundle=RESA_BUNDLE)
 
 """ MusicHandler """
 RESA_MH = MusicHandler(PATH_MUSIC)
 RESA_MH.set_endevent(RESA_EH.RESA_MUSIC_ENDED_EVENT)
-RESA_MH.load()
+RESA_AL.submit('music', RESA_MH.load)
+
+RESA_AL.wait()
 
 """ DebugHandler """
 RESA_DH = DebugHandler()
+RESA_DH.blit_audit.enabled = RESA_CH.blit_audit
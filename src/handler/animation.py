@@ -0,0 +1,106 @@
+""" This module provides a global clock for frame animations
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+
+
+class Animation(object):
+    def __init__(self, frames: int, frame_time: int) -> None:
+        """ Creates the shared state of an animation type.
+
+        :param frames: number of frames
+        :param frame_time: time a frame is shown, in milliseconds of game time
+        """
+        self.frames = frames
+        self.frame_time = frame_time
+        # current frame including its shown part
+        self.position = 0.0
+        self.index = 0
+
+    def frame(self, phase: int = 0) -> int:
+        """ Returns the current frame of an entity.
+
+        :param phase: number of frames the entity is ahead of the others
+        :return: frame index
+        """
+        return (self.index + phase) % self.frames
+
+
+class AnimationClock(object):
+    def __init__(self, max_step: int = 250) -> None:
+        """ Advances all animations once per frame by the elapsed game time, so their speed does not depend
+            on the frame rate. Entities share the state of their animation type and look up their current
+            frame when they are drawn, so they do not need to be updated.
+
+        :param max_step: maximal time an update advances, in milliseconds, so long frames do not skip frames
+        """
+        self.max_step = max_step
+        self.animations = {}
+        # counts changed frames, so callers can cache what depends on them
+        self.version = 0
+        self._time = None
+
+    def add(self, name: str, frames: int, frame_time: int = 100) -> Animation:
+        """ Returns an animation type and creates it if needed.
+
+        :param name: name of the animation type
+        :param frames: number of frames
+        :param frame_time: time a frame is shown of a new animation type, in milliseconds
+        :return: animation
+        """
+        animation = self.animations.get(name)
+        if animation is None:
+            animation = self.animations[name] = Animation(frames, frame_time)
+        elif animation.frames != frames:
+            animation.frames = frames
+            animation.position %= frames
+            animation.index %= frames
+
+        return animation
+
+    def set_frame_time(self, name: str, frame_time: int) -> None:
+        """ Sets the time a frame of an animation type is shown, e.g. by the quality level.
+
+        :param name: name of the animation type
+        :param frame_time: time in milliseconds
+        :return: None
+        """
+        animation = self.animations.get(name)
+        if animation is None:
+            self.animations[name] = Animation(1, frame_time)
+        else:
+            animation.frame_time = frame_time
+
+    def update(self, time: int) -> bool:
+        """ Advances all animations to a game time.
+
+        :param time: current game time in milliseconds
+        :return: True if a frame changed
+        """
+        elapsed = 0 if self._time is None else min(max(0, time - self._time), self.max_step)
+        self._time = time
+        if not elapsed:
+            return False
+
+        changed = False
+        for animation in self.animations.values():
+            animation.position = (animation.position + elapsed / max(1, animation.frame_time)) % animation.frames
+            index = int(animation.position)
+            if index != animation.index:
+                animation.index = index
+                changed = True
+        if changed:
+            self.version += 1
+
+        return changed
+
+    def frame(self, name: str, phase: int = 0) -> int:
+        """ Returns the current frame of an animation type.
+
+        :param name: name of the animation type
+        :param phase: number of frames the entity is ahead of the others
+        :return: frame index
+        """
+        return self.animations[name].frame(phase)
@@ -0,0 +1,145 @@
+""" This module provides an on-disk cache of decoded and converted images
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+import pygame
+
+MAGIC = b'RESA'
+VERSION = 1
+HEADER = struct.Struct('<4sHI')
+ALIGNMENT = 16
+
+
+class AssetCache(object):
+    def __init__(self, path: str) -> None:
+        """ Creates a cache that stores raw pixel data of images on disk and maps it back into surfaces
+            without decoding the source files again.
+
+        :param path: directory of the cache files
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def pixel_format() -> str:
+        """ Returns the byte order of raw pixels that matches the display format, so converting
+            cached pixels to the display is a plain copy.
+
+        :return: format string for pygame.image.tobytes() and frombuffer()
+        """
+        display = pygame.display.get_surface()
+        if display is not None and display.get_masks()[:3] == (0xff0000, 0xff00, 0xff):
+            return 'BGRA'
+        return 'RGBA'
+
+    @staticmethod
+    def file_stamp(filename: str) -> str | None:
+        """ Returns a stamp of a source file that changes with its content.
+
+        :param filename: source file
+        :return: stamp of path, modification time and size or None if the file does not exist
+        """
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+        return f'{filename}:{stat.st_mtime_ns}:{stat.st_size}'
+
+    def stamp(self, *parts) -> str:
+        """ Returns a cache stamp of the given parts and the current target format.
+
+        :param parts: values the cached asset depends on
+        :return: stamp
+        """
+        display = pygame.display.get_surface()
+        masks = display.get_masks() if display is not None else None
+        return '|'.join([str(part) for part in parts] + [self.pixel_format(), str(masks)])
+
+    def filename(self, name: str) -> str:
+        return os.path.join(self.path, f'{name}.raw')
+
+    def load(self, name: str, stamp: str) -> tuple[pygame.Surface, dict] | None:
+        """ Maps a cached image into a display converted surface.
+
+        :param name: name of the cached image
+        :param stamp: stamp the cached image has to match
+        :return: surface and its meta data or None if not cached or outdated
+        """
+        try:
+            with open(self.filename(name), 'rb') as file:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    magic, version, header_size = HEADER.unpack_from(buffer)
+                    if magic != MAGIC or version != VERSION:
+                        raise ValueError('unknown cache file format')
+                    header = json.loads(bytes(buffer[HEADER.size:HEADER.size + header_size]))
+                    if header['stamp'] != stamp:
+                        self.misses += 1
+                        return None
+                    offset = header['offset']
+                    size = tuple(header['size'])
+                    with memoryview(buffer) as view:
+                        raw = pygame.image.frombuffer(view[offset:offset + header['length']], size, header['format'])
+                        if header['alpha']:
+                            image = raw.convert_alpha()
+                        else:
+                            image = raw.convert()
+                        del raw
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            logging.warning(f'Ignored broken asset cache file {name}: {e}')
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        return image, header['meta']
+
+    def store(self, name: str, stamp: str, image: pygame.Surface, meta: dict = None) -> None:
+        """ Stores the raw pixels of an image in the cache.
+
+        :param name: name of the cached image
+        :param stamp: stamp of the sources of the image
+        :param image: image to store
+        :param meta: optional json serializable data stored with the image
+        :return: None
+        """
+        pixel_format = self.pixel_format()
+        pixels = pygame.image.tobytes(image, pixel_format)
+        header = {
+            'stamp': stamp,
+            'size': image.get_size(),
+            'format': pixel_format,
+            'alpha': bool(image.get_flags() & pygame.SRCALPHA),
+            'length': len(pixels),
+            'meta': meta if meta is not None else {},
+            'offset': 0,
+        }
+        # pixel data starts aligned behind the header, the offset is part of the header itself
+        header_data = json.dumps(header).encode()
+        offset = HEADER.size + len(header_data) + 16
+        header['offset'] = offset + (-offset % ALIGNMENT)
+        header_data = json.dumps(header).encode().ljust(header['offset'] - HEADER.size)
+
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            temp = f'{self.filename(name)}.tmp'
+            with open(temp, 'wb') as file:
+                file.write(HEADER.pack(MAGIC, VERSION, len(header_data)))
+                file.write(header_data)
+                file.write(pixels)
+            os.replace(temp, self.filename(name))
+        except OSError as e:
+            logging.warning(f'Could not write asset cache file {name}: {e}')
+
+    def __str__(self):
+        return f'{self.hits} hits | {self.misses} misses'
@@ -0,0 +1,280 @@
+""" This module provides texture atlases of pre-scaled world sprites
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import logging
+import threading
+import pygame
+from src.handler.spritesheet import SpriteSheetHandler, scale
+
+
+class TextureAtlas(object):
+    def __init__(self, zoom: int, sheet_handler: SpriteSheetHandler, widths: dict, max_width: int = 1024) -> None:
+        """ Creates a texture atlas that packs every frame of the given sprite sheets, scaled to the grid
+            zoom and converted to display format, into one surface.
+
+        :param zoom: grid zoom the frames are scaled to
+        :param sheet_handler: sprite sheet handler with the sheets to pack
+        :param widths: sprite sheet keys with a tuple of frame widths in grid zoom units
+        :param max_width: maximal width of the atlas surface
+        """
+        self._zoom = zoom
+        self.max_width = max_width
+        self.regions = {}
+        self.sprites = {}
+        self.image = None
+
+        self.build(sheet_handler, widths, max_width)
+
+    @property
+    def zoom(self) -> int:
+        return self._zoom
+
+    def build(self, sheet_handler: SpriteSheetHandler, widths: dict, max_width: int) -> None:
+        """ Scales all frames, packs them row by row and creates the atlas surface with its region table.
+            Uses the asset bundle and the asset cache of the sheet handler to skip decoding and scaling
+            if possible.
+
+        :param sheet_handler: sprite sheet handler with the sheets to pack
+        :param widths: sprite sheet keys with a tuple of frame widths in grid zoom units
+        :param max_width: maximal width of the atlas surface
+        :return: None
+        """
+        if sheet_handler.bundle:
+            stamp = self.bundle_stamp(sheet_handler, widths, max_width)
+            bundled = sheet_handler.bundle.image(self.bundle_name, stamp)
+            if bundled is not None:
+                self.__set_image(*bundled)
+                logging.info(f'Loaded texture atlas for zoom {self.zoom} from asset bundle')
+                return
+
+        asset_cache = sheet_handler.asset_cache
+        if asset_cache is not None:
+            sheet_stamps = [sheet_handler.get(key).stamp() for key in widths]
+            # missing sheet sources are built as empty frames and never cached
+            if None in sheet_stamps:
+                asset_cache = None
+        if asset_cache is not None:
+            stamp = asset_cache.stamp('mipmap', self.zoom, max_width, sorted(widths.items()), *sheet_stamps)
+            cached = asset_cache.load(f'atlas_{self.zoom}', stamp)
+            if cached is not None:
+                self.__set_image(*cached)
+                logging.info(f'Loaded texture atlas for zoom {self.zoom} from asset cache')
+                return
+
+        frames = []
+        for key, factors in widths.items():
+            sheet = sheet_handler.get(key)
+            for factor in factors:
+                size = sheet_handler.aspect_ratio(sheet.sprite_size, self.zoom * factor)
+                for index in sheet.pattern:
+                    frames.append(((key, index, factor), size))
+
+        # pack frames into rows, highest frames first to keep the rows tight
+        frames.sort(key=lambda frame: frame[1][1], reverse=True)
+        atlas_width = max([max_width] + [size[0] for region, size in frames])
+        pos_x = pos_y = row_height = 0
+        for region, size in frames:
+            if pos_x + size[0] > atlas_width:
+                pos_x = 0
+                pos_y += row_height
+                row_height = 0
+            self.regions[region] = pygame.Rect((pos_x, pos_y), size)
+            pos_x += size[0]
+            row_height = max(row_height, size[1])
+
+        # blit scaled frames as exact per-pixel alpha copies into the atlas
+        self.image = pygame.Surface((atlas_width, max(1, pos_y + row_height)), pygame.SRCALPHA).convert_alpha()
+        self.image.fill((0, 0, 0, 0))
+        for (key, index, factor), rect in self.regions.items():
+            frame = scale(sheet_handler.get(key).mipmap(index, rect.size), rect.size).convert_alpha()
+            self.image.blit(frame, rect, special_flags=pygame.BLEND_RGBA_MAX)
+        for region, rect in self.regions.items():
+            self.sprites[region] = self.image.subsurface(rect)
+
+        if asset_cache is not None:
+            asset_cache.store(f'atlas_{self.zoom}', stamp, self.image, self.meta)
+
+        logging.info(f'Built texture atlas for zoom {self.zoom}: {len(self.regions)} frames, '
+                     f'{self.image.get_width()}x{self.image.get_height()}')
+
+    @property
+    def bundle_name(self) -> str:
+        return f'atlas:{self.zoom}'
+
+    @property
+    def meta(self) -> dict:
+        return {'regions': [[*region, *rect] for region, rect in self.regions.items()]}
+
+    def bundle_stamp(self, sheet_handler: SpriteSheetHandler, widths: dict, max_width: int) -> str | None:
+        """ Returns the asset bundle stamp of the atlas.
+
+        :param sheet_handler: sprite sheet handler with the sheets to pack
+        :param widths: sprite sheet keys with a tuple of frame widths in grid zoom units
+        :param max_width: maximal width of the atlas surface
+        :return: stamp of the layout and the sheets or None if a sheet source does not exist
+        """
+        sheet_stamps = [sheet_handler.get(key).bundle_stamp() for key in widths]
+        if None in sheet_stamps:
+            return None
+        return '|'.join(str(part) for part in ['mipmap', self.zoom, max_width, sorted(widths.items())] + sheet_stamps)
+
+    def __set_image(self, image: pygame.Surface, meta: dict) -> None:
+        """ Sets a prebuilt atlas image and its region table.
+
+        :param image: atlas image
+        :param meta: meta data with the region table
+        :return: None
+        """
+        self.image = image
+        for key, index, factor, x, y, width, height in meta['regions']:
+            self.regions[(key, index, factor)] = pygame.Rect(x, y, width, height)
+        for region, rect in self.regions.items():
+            self.sprites[region] = self.image.subsurface(rect)
+
+    def image_by_index(self, key: str, index: int, width: int) -> pygame.Surface:
+        """ Returns the atlas region of a frame as read-only view.
+
+        :param key: sprite sheet key
+        :param index: sprite index
+        :param width: frame width in grid zoom units
+        :return: view of the frame in the atlas
+        """
+        try:
+            return self.sprites[(key, index, width)]
+        except KeyError:
+            raise KeyError(f'Frame is not part of the atlas: {key}, {index}, {width}')
+
+
+class AtlasHandler(object):
+    def __init__(self, sheet_handler: SpriteSheetHandler, widths: dict, release_sheets: bool = False) -> None:
+        """ Creates a handler that holds one texture atlas per grid zoom.
+
+        :param sheet_handler: sprite sheet handler with the sheets to pack
+        :param widths: sprite sheet keys with a tuple of frame widths in grid zoom units
+        :param release_sheets: drops the full size sheets after an atlas is built if True
+        """
+        self._sheet_handler = sheet_handler
+        self._widths = widths
+        self.release_sheets = release_sheets
+        self._lock = threading.Lock()
+        self.atlases = {}
+        # atlas region of every frame and frame mappings between grid zooms
+        self.origins = {}
+        self._zoomed = {}
+        # zooms the prefetch threads have not built yet by thread
+        self._prefetching = {}
+        self._paused = threading.Event()
+
+    @property
+    def keys(self) -> list:
+        return list(self._widths.keys())
+
+    def build(self, zoom: int) -> TextureAtlas:
+        """ Builds the atlas for a grid zoom if it does not exist yet. Safe to be called from a
+            background thread.
+
+        :param zoom: grid zoom
+        :return: atlas of the grid zoom
+        """
+        with self._lock:
+            if zoom not in self.atlases:
+                self.atlases[zoom] = TextureAtlas(zoom, self._sheet_handler, self._widths)
+                self.origins.update((image, region) for region, image in self.atlases[zoom].sprites.items())
+                self._zoomed.clear()
+                if self.release_sheets:
+                    for key in self.keys:
+                        self._sheet_handler.get(key).release()
+
+        return self.atlases[zoom]
+
+    def get(self, zoom: int) -> TextureAtlas:
+        """ Returns the atlas of a grid zoom and builds it on first use.
+
+        :param zoom: grid zoom
+        :return: atlas of the grid zoom
+        """
+        return self.build(zoom)
+
+    def prefetch(self, zooms: list) -> threading.Thread:
+        """ Builds the atlases of grid zooms on a background thread, e.g. of zooms that are likely to be
+            used soon, so switching to them does not stall a frame.
+
+        :param zooms: grid zooms
+        :return: the started thread
+        """
+        zooms = list(zooms)
+        remaining = list(zooms)
+
+        def run():
+            while remaining:
+                if self._paused.is_set():
+                    return
+                self.build(remaining[0])
+                remaining.pop(0)
+            with self._lock:
+                self._prefetching.pop(thread, None)
+            logging.info(f'Prefetched texture atlases for zooms: {", ".join(str(zoom) for zoom in zooms)}')
+
+        thread = threading.Thread(target=run, name='AtlasPrefetch', daemon=True)
+        with self._lock:
+            self._prefetching[thread] = remaining
+        thread.start()
+
+        return thread
+
+    def pause(self) -> None:
+        """ Stops the prefetch threads after the atlas they are building and waits for them, e.g. while the
+            display is created again.
+
+        :return: None
+        """
+        self._paused.set()
+        with self._lock:
+            threads = list(self._prefetching)
+        for thread in threads:
+            thread.join()
+
+    def resume(self) -> None:
+        """ Builds the atlases the paused prefetch threads did not build on a new thread.
+
+        :return: None
+        """
+        with self._lock:
+            zooms = sorted({zoom for remaining in self._prefetching.values() for zoom in remaining})
+            self._prefetching.clear()
+        self._paused.clear()
+        if zooms:
+            self.prefetch(zooms)
+
+    def zoomed(self, zoom: int) -> dict:
+        """ Returns a mapping of all frames of the built atlases to the same frames at a grid zoom. The
+            atlas of the zoom is built if needed.
+
+        :param zoom: grid zoom
+        :return: frames at the zoom by frame
+        """
+        mapping = self._zoomed.get(zoom)
+        if mapping is None:
+            sprites = self.get(zoom).sprites
+            # atlases of other zooms may be built on a background thread meanwhile
+            with self._lock:
+                mapping = self._zoomed[zoom] = {image: sprites[region] for image, region in self.origins.items()}
+
+        return mapping
+
+    def release(self, zoom: int) -> None:
+        """ Drops the atlas of a grid zoom. Frames that are still in use stay valid.
+
+        :param zoom: grid zoom
+        :return: None
+        """
+        with self._lock:
+            atlas = self.atlases.pop(zoom, None)
+            if atlas is not None:
+                for image in atlas.sprites.values():
+                    del self.origins[image]
+                self._zoomed.clear()
+                logging.debug(f'Released texture atlas for zoom {zoom}')
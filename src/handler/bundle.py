@@ -0,0 +1,275 @@
+""" This module provides a single-file, memory-mapped bundle of pre-converted assets
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+import pygame
+from src.handler.assetcache import AssetCache
+import src.handler.pixelformat as pixelformat
+
+MAGIC = b'RESB'
+VERSION = 1
+HEADER = struct.Struct('<4sHI')
+ALIGNMENT = 64
+
+IMAGE = 'image'
+SOUND = 'sound'
+DATA = 'data'
+
+
+class AssetBundle(object):
+    def __init__(self, filename: str) -> None:
+        """ Creates a bundle of pre-converted images, raw audio samples and data files. The bundle file
+            is memory-mapped once, images are created from slices of the mapping.
+
+        :param filename: filename of the bundle
+        """
+        self.filename = filename
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._file = None
+        self._buffer = None
+        self._view = None
+
+    def open(self) -> bool:
+        """ Maps the bundle file and reads its index.
+
+        :return: True if the bundle could be opened
+        """
+        if self._buffer is not None:
+            return True
+        try:
+            self._file = open(self.filename, 'rb')
+            # copy on write, so surfaces made from the mapping never write back into the file
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_COPY)
+            magic, version, index_size = HEADER.unpack_from(self._buffer)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError('unknown bundle format')
+            self.entries = json.loads(bytes(self._buffer[HEADER.size:HEADER.size + index_size]))
+            self._view = memoryview(self._buffer)
+        except FileNotFoundError:
+            self.close()
+            return False
+        except (OSError, ValueError, struct.error) as e:
+            logging.warning(f'Ignored broken asset bundle {self.filename}: {e}')
+            self.close()
+            return False
+
+        logging.info(f'Opened asset bundle {self.filename} with {len(self.entries)} assets')
+        return True
+
+    def close(self) -> None:
+        """ Drops the index and closes the file. Surfaces created from the bundle keep the mapping
+            alive until they are released.
+
+        :return: None
+        """
+        self.entries = {}
+        self._view = None
+        self._buffer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def stamp(filename: str, *parts) -> str | None:
+        """ Returns the stamp of an asset made from a source file. Bundles may ship without their
+            sources, so the stamp is None if the source does not exist.
+
+        :param filename: source file
+        :param parts: further values the asset depends on
+        :return: stamp or None
+        """
+        file_stamp = AssetCache.file_stamp(filename)
+        if file_stamp is None:
+            return None
+        return '|'.join([file_stamp] + [str(part) for part in parts])
+
+    def entry(self, name: str, kind: str, stamp: str = None) -> dict | None:
+        """ Returns the index entry of an asset if it is bundled and up-to-date.
+
+        :param name: name of the asset
+        :param kind: IMAGE | SOUND | DATA
+        :param stamp: stamp the asset has to match, any stamp is accepted if None
+        :return: index entry or None
+        """
+        entry = self.entries.get(name)
+        if entry is None or entry['kind'] != kind or (stamp is not None and entry['stamp'] != stamp):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry
+
+    def data(self, name: str, stamp: str = None) -> memoryview | None:
+        """ Returns the raw bytes of a bundled asset without copying them.
+
+        :param name: name of the asset
+        :param stamp: stamp the asset has to match
+        :return: view of the bytes or None
+        """
+        entry = self.entry(name, DATA, stamp)
+        if entry is None:
+            return None
+        return self._view[entry['offset']:entry['offset'] + entry['length']]
+
+    def image(self, name: str, stamp: str = None) -> tuple[pygame.Surface, dict] | None:
+        """ Creates a surface from a bundled image. Alpha images whose layout already matches the
+            display are used in place, all others are copied into display format.
+
+        :param name: name of the asset
+        :param stamp: stamp the asset has to match
+        :return: surface and its meta data or None
+        """
+        entry = self.entry(name, IMAGE, stamp)
+        if entry is None:
+            return None
+
+        pixels = self._view[entry['offset']:entry['offset'] + entry['length']]
+        image = pygame.image.frombuffer(pixels, tuple(entry['size']), entry['format'])
+        if entry['alpha']:
+            if image.get_masks() != pixelformat.surface((1, 1), pixelformat.ALPHA).get_masks():
+                image = image.convert_alpha()
+        else:
+            image = image.convert()
+
+        return image, entry['meta']
+
+    def sound(self, name: str, stamp: str = None) -> pygame.mixer.Sound | None:
+        """ Creates a sound from bundled raw samples if they match the current mixer format.
+
+        :param name: name of the asset
+        :param stamp: stamp the asset has to match
+        :return: sound or None
+        """
+        entry = self.entry(name, SOUND, stamp)
+        if entry is None or tuple(entry['meta']['mixer']) != pygame.mixer.get_init():
+            return None
+        return pygame.mixer.Sound(buffer=self._view[entry['offset']:entry['offset'] + entry['length']])
+
+    def load_image(self, filename: str, pixel_format: str = pixelformat.OPAQUE) -> pygame.Surface:
+        """ Returns an image file, from the bundle if possible.
+
+        :param filename: image file
+        :param pixel_format: OPAQUE | ALPHA
+        :return: display converted image
+        """
+        bundled = self.image(f'image:{filename}', self.stamp(filename, pixel_format))
+        if bundled is not None:
+            return bundled[0]
+        return pixelformat.convert(pygame.image.load(filename), pixel_format)
+
+    def load_sound(self, filename: str) -> pygame.mixer.Sound:
+        """ Returns a sound file, from the bundle if possible.
+
+        :param filename: sound file
+        :return: sound
+        """
+        sound = self.sound(f'sound:{filename}', self.stamp(filename))
+        if sound is not None:
+            return sound
+        return pygame.mixer.Sound(filename)
+
+    def load_bytes(self, filename: str) -> bytes:
+        """ Returns the content of a data file, from the bundle if possible.
+
+        :param filename: data file
+        :return: content of the file
+        """
+        data = self.data(f'data:{filename}', self.stamp(filename))
+        if data is not None:
+            return bytes(data)
+        with open(filename, 'rb') as file:
+            return file.read()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def __bool__(self):
+        return self._buffer is not None
+
+    def __str__(self):
+        return f'{self.hits} hits | {self.misses} misses'
+
+
+class BundleBuilder(object):
+    def __init__(self) -> None:
+        """ Collects assets and writes them into a bundle file """
+        self.entries = {}
+        self.blobs = {}
+
+    def add_image(self, name: str, image: pygame.Surface, stamp: str | None, meta: dict = None) -> None:
+        """ Adds the raw pixels of a display converted image.
+
+        :param name: name of the asset
+        :param image: image
+        :param stamp: stamp of its sources
+        :param meta: optional json serializable data
+        :return: None
+        """
+        pixel_format = AssetCache.pixel_format()
+        self.__add(name, IMAGE, pygame.image.tobytes(image, pixel_format), stamp, meta,
+                   size=image.get_size(), format=pixel_format, alpha=bool(image.get_flags() & pygame.SRCALPHA))
+
+    def add_sound(self, name: str, sound: pygame.mixer.Sound, stamp: str | None) -> None:
+        """ Adds the raw samples of a sound in the current mixer format.
+
+        :param name: name of the asset
+        :param sound: sound
+        :param stamp: stamp of its source
+        :return: None
+        """
+        self.__add(name, SOUND, sound.get_raw(), stamp, {'mixer': pygame.mixer.get_init()})
+
+    def add_data(self, name: str, data: bytes, stamp: str | None) -> None:
+        """ Adds raw bytes.
+
+        :param name: name of the asset
+        :param data: bytes
+        :param stamp: stamp of its source
+        :return: None
+        """
+        self.__add(name, DATA, bytes(data), stamp, {})
+
+    def __add(self, name: str, kind: str, data: bytes, stamp: str | None, meta: dict | None, **fields) -> None:
+        self.entries[name] = {'kind': kind, 'stamp': stamp, 'length': len(data),
+                              'meta': meta if meta is not None else {}, 'offset': 0, **fields}
+        self.blobs[name] = data
+
+    def write(self, filename: str) -> int:
+        """ Writes all assets with aligned offsets into the bundle file.
+
+        :param filename: filename of the bundle
+        :return: size of the bundle in bytes
+        """
+        # offsets are part of the index, so the index size is fixed first with generous placeholders
+        for entry in self.entries.values():
+            entry['offset'] = 1 << 40
+        index_size = len(json.dumps(self.entries).encode())
+        offset = HEADER.size + index_size
+        for name, entry in self.entries.items():
+            offset += -offset % ALIGNMENT
+            entry['offset'] = offset
+            offset += entry['length']
+        index = json.dumps(self.entries).encode().ljust(index_size)
+
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        temp = f'{filename}.tmp'
+        with open(temp, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, len(index)))
+            file.write(index)
+            for name, entry in self.entries.items():
+                file.write(b'\0' * (entry['offset'] - file.tell()))
+                file.write(self.blobs[name])
+            size = file.tell()
+        os.replace(temp, filename)
+
+        logging.info(f'Wrote asset bundle {filename}: {len(self.entries)} assets, {size // 1024} KiB')
+        return size
@@ -5,6 +5,7 @@
 :license: CC-BY-SA-4.0
 """
 import pygame
+from src.handler.pixelformat import BlitAudit
 
 
 class DebugHandler(object):
@@ -17,6 +18,7 @@ class DebugHandler(object):
         self.LOUD = 1
         self._mode = mode
         self._play_time = pygame.time.get_ticks()
+        self.blit_audit = BlitAudit()
 
     @property
     def mode(self) -> int:
@@ -0,0 +1,53 @@
+""" This module provides change tracking of drawn sprites for dirty rectangle updates
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import pygame
+
+
+class DirtyTracker(object):
+    def __init__(self) -> None:
+        """ Remembers image and position of drawn sprites to find the areas that changed between two frames """
+        self.states = {}
+
+    def changes(self, sprites) -> list[pygame.Rect]:
+        """ Compares the sprites with the ones of the last call. Sprites that got another image or position
+            report their old and new rect, added sprites their new and removed sprites their old rect.
+
+        :param sprites: iterable of the sprites drawn in this frame
+        :return: changed rects in the coordinates of the sprites
+        """
+        states = {sprite: (sprite.image, tuple(sprite.rect)) for sprite in sprites}
+        rects = diff(self.states, states)
+        self.states = states
+
+        return rects
+
+    def clear(self) -> None:
+        """ Forgets all sprites
+
+        :return: None
+        """
+        self.states.clear()
+
+
+def diff(old: dict, new: dict) -> list[pygame.Rect]:
+    """ Compares two states of sprites, each mapping a sprite to its image and rect tuple.
+
+    :param old: sprite states of the last frame
+    :param new: sprite states of the current frame
+    :return: old and new rects of changed sprites, new rects of added and old rects of removed sprites
+    """
+    rects = []
+    for sprite, state in new.items():
+        last = old.get(sprite)
+        if last is None:
+            rects.append(pygame.Rect(state[1]))
+        elif last[0] is not state[0] or last[1] != state[1]:
+            rects.append(pygame.Rect(state[1]))
+            rects.append(pygame.Rect(last[1]))
+    rects.extend(pygame.Rect(state[1]) for sprite, state in old.items() if sprite not in new)
+
+    return rects
@@ -0,0 +1,50 @@
+""" This module provides font handling
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import threading
+import pygame
+
+
+class FontHandler(object):
+    def __init__(self, sysfont: str = 'Arial') -> None:
+        """ Creates a font handler that shares font objects between all forms
+
+        :param sysfont: name of the system font used if no font file is given
+        """
+        self.sysfont = sysfont
+        self.fonts = {}
+        self._lock = threading.Lock()
+
+    def get(self, font: str | bool | None, size: int) -> pygame.font.Font:
+        """ Returns the font in the given size and loads it if needed.
+
+        :param font: pathname to font file, None for pygame's default font or False for the system font
+        :param size: font size
+        :return: font
+        """
+        key = (font, size)
+        if key not in self.fonts:
+            if font is False:
+                loaded = pygame.font.SysFont(self.sysfont, size)
+            else:
+                loaded = pygame.font.Font(font, size)
+            with self._lock:
+                self.fonts.setdefault(key, loaded)
+        return self.fonts[key]
+
+    def load(self, font: str | bool | None, sizes: tuple, loader=None) -> None:
+        """ Loads the font in several sizes, in parallel if an asset loader is given.
+
+        :param font: pathname to font file, None for pygame's default font or False for the system font
+        :param sizes: font sizes to load
+        :param loader: optional asset loader
+        :return: None
+        """
+        for size in sizes:
+            if loader is None:
+                self.get(font, size)
+            else:
+                loader.submit(f'font {self.sysfont if font is False else font} {size}', self.get, font, size)
@@ -0,0 +1,78 @@
+""" This module provides shared frame sets of world entities
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import pygame
+from src.handler.atlas import AtlasHandler
+
+
+class FrameSet(object):
+    def __init__(self, images: tuple) -> None:
+        """ Creates an immutable set of frames that is shared by all entities of the same kind.
+
+        :param images: frames in order of their index
+        """
+        self._images = images
+        self._masks = {}
+
+    @property
+    def images(self) -> tuple:
+        return self._images
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self._images[0].get_size()
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def __getitem__(self, index: int) -> pygame.Surface:
+        return self._images[index]
+
+    def mask(self, index: int = 0) -> pygame.mask.Mask:
+        """ Returns the collision mask of a frame and creates it on first use.
+
+        :param index: index of the frame
+        :return: mask
+        """
+        if index not in self._masks:
+            self._masks[index] = pygame.mask.from_surface(self._images[index])
+        return self._masks[index]
+
+
+class FrameSetHandler(object):
+    def __init__(self, atlas_handler: AtlasHandler) -> None:
+        """ Creates a registry of frame sets taken from the texture atlases
+
+        :param atlas_handler: atlas handler the frames are taken from
+        """
+        self.atlas_handler = atlas_handler
+        self.frame_sets = {}
+
+    def get(self, key: str, indices: tuple, width: int, zoom: int) -> FrameSet:
+        """ Returns the shared frame set of the given sprites and creates it if needed.
+
+        :param key: key of the sprite sheet
+        :param indices: sprite indices of the frames
+        :param width: frame width in grid zoom units
+        :param zoom: grid zoom
+        :return: frame set
+        """
+        registry_key = (key, tuple(indices), width, zoom)
+        if registry_key not in self.frame_sets:
+            atlas = self.atlas_handler.get(zoom)
+            images = tuple(atlas.image_by_index(key, index, width) for index in indices)
+            self.frame_sets[registry_key] = FrameSet(images)
+        return self.frame_sets[registry_key]
+
+    def clear(self) -> None:
+        """ Removes all frame sets
+
+        :return: None
+        """
+        self.frame_sets.clear()
+
+    def __len__(self) -> int:
+        return len(self.frame_sets)
@@ -130,10 +130,21 @@ class Settings(object):
         # display settings
         self.icon = 'res/images/icon.png'
         self.fps = 60
+        # menus and paused screens wait for events instead of rendering at fps, at most timeout ms
+        self.idle_wait = True
+        self.idle_timeout = 500
+        # render backend of the game, surface or renderer, renderer draws the map with SDL textures
+        self.render_backend = 'surface'
         self.fullscreen = False
         self.grid_zoom = 20
+        # grid zooms of the map, world coordinates are made for grid_zoom
+        self.zoom_levels = (10, 20, 40)
         self.background_image = None
         self.map_border_thickness = 5
+        self.dirty_rects = True
+        # resolution the map, or the whole display if render_scale_ui, is rendered at
+        self.render_scale = 1.0
+        self.render_scale_ui = False
 
         # standard game values
         self.game_speed = 1440
@@ -145,10 +156,40 @@ class Settings(object):
         self.volume = .2
         self.bg_music = None
         self.sounds = 'res/sounds'
+        self.islands = 'data/islands'
         self.screenshot_path = 'data/saves/'
         self.autosave = False
         self.autosave_interval = 240000
 
+        # caches and asset loading
+        self.sprite_cache_size = 32
+        self.terrain_chunk_size = 512
+        # maximal number of terrain chunks of all zooms, derived from the view if 0
+        self.terrain_chunks = 0
+        # time per frame the terrain of other quality levels is rasterized ahead of time, in milliseconds
+        self.terrain_warm_time = 4
+        self.zoom_cache = 2
+
+        # adaptive quality, levels from lowest to highest quality
+        self.quality_governor = True
+        self.quality_min = 0
+        self.quality_max = 3
+        self.quality_window = 60
+        self.quality_cooldown = 120
+        self.quality_levels = (
+            {'render_scale': .5, 'grid': False, 'fish_frame_time': 350, 'update_margin': 0, 'update_budget': 250},
+            {'render_scale': .75, 'grid': False, 'fish_frame_time': 180, 'update_margin': 128, 'update_budget': 500},
+            {'render_scale': 1.0, 'grid': True, 'fish_frame_time': 100, 'update_margin': 256, 'update_budget': 1000},
+            {'render_scale': 1.0, 'grid': True, 'fish_frame_time': 100, 'update_margin': 256, 'update_budget': 0},
+        )
+        self.prefetch_sprites = True
+        self.release_sheets = True
+        self.asset_cache = True
+        self.asset_cache_path = 'data/cache/'
+        self.bundle_file = 'data/resa.bundle'
+        self.loader_threads = 0
+        self.blit_audit = False
+
         # sprite sheets
         self.sp_menu_btn_key = None
         self.sp_menu_btn = None
@@ -157,6 +198,15 @@ class Settings(object):
         self.sp_menu_swt = None
         self.sp_menu_swt_size = None
         self.sp_world = None
+        # frame widths of world sprites in grid zoom units, packed into the texture atlas
+        self.atlas_widths = {
+            'Tiles': (2,),
+            'Trees': (2,),
+            'Fishes': (2,),
+            'Rocks': (2,),
+            'Mountain': (10,),
+            'Buildings': (2, 4, 6),
+        }
 
         # spawn rates
         self.tree_spawn_bl = 50
@@ -229,9 +279,35 @@ class Settings(object):
         self.parser.read(filepath)
 
         self.background_image = self.parser.get('Screen', 'BackgroundImage')
+        self.dirty_rects = self.parser.getboolean('Screen', 'DirtyRects', fallback=self.dirty_rects)
+        self.render_scale = self.parser.getfloat('Screen', 'RenderScale', fallback=self.render_scale)
+        self.render_scale_ui = self.parser.getboolean('Screen', 'RenderScaleUI', fallback=self.render_scale_ui)
+        self.idle_wait = self.parser.getboolean('Screen', 'IdleWait', fallback=self.idle_wait)
+        self.idle_timeout = self.parser.getint('Screen', 'IdleTimeout', fallback=self.idle_timeout)
+        self.render_backend = self.parser.get('Screen', 'Backend', fallback=self.render_backend).strip().lower()
+        zoom_levels = literal_eval(self.parser.get('Screen', 'ZoomLevels', fallback=str(self.zoom_levels)))
+        if isinstance(zoom_levels, int):
+            zoom_levels = (zoom_levels,)
+        self.zoom_levels = tuple(sorted(set(zoom_levels) | {self.grid_zoom}))
         self.save_file = self.parser.get('GameSettings', 'SaveFile')
         self.bg_music = self.parser.get('Music', 'BackgroundMusic')
         self.volume = self.parser.getfloat('Music', 'StartVolume')
+        self.sprite_cache_size = self.parser.getint('Cache', 'SpriteCacheSize', fallback=self.sprite_cache_size)
+        self.prefetch_sprites = self.parser.getboolean('Cache', 'PrefetchSprites', fallback=self.prefetch_sprites)
+        self.release_sheets = self.parser.getboolean('Cache', 'ReleaseSheets', fallback=self.release_sheets)
+        self.asset_cache = self.parser.getboolean('Cache', 'AssetCache', fallback=self.asset_cache)
+        self.asset_cache_path = self.parser.get('Cache', 'AssetCachePath', fallback=self.asset_cache_path)
+        self.bundle_file = self.parser.get('Cache', 'Bundle', fallback=self.bundle_file)
+        self.loader_threads = self.parser.getint('Cache', 'LoaderThreads', fallback=self.loader_threads)
+        self.zoom_cache = self.parser.getint('Cache', 'ZoomCache', fallback=self.zoom_cache)
+        self.terrain_warm_time = self.parser.getfloat('Cache', 'TerrainWarmTime', fallback=self.terrain_warm_time)
+        self.terrain_chunks = self.parser.getint('Cache', 'TerrainChunks', fallback=self.terrain_chunks)
+        self.blit_audit = self.parser.getboolean('Debug', 'BlitAudit', fallback=self.blit_audit)
+        self.quality_governor = self.parser.getboolean('Quality', 'Governor', fallback=self.quality_governor)
+        self.quality_min = self.parser.getint('Quality', 'MinLevel', fallback=self.quality_min)
+        self.quality_max = self.parser.getint('Quality', 'MaxLevel', fallback=self.quality_max)
+        self.quality_window = self.parser.getint('Quality', 'Window', fallback=self.quality_window)
+        self.quality_cooldown = self.parser.getint('Quality', 'Cooldown', fallback=self.quality_cooldown)
 
     def load_sprite_file(self, filepath: str) -> None:
         """ Loads sprite sheets from config file
@@ -250,17 +326,26 @@ class Settings(object):
         self.sp_world = {
             self.parser.get('Objects', 'TilesID'): (
                 self.parser.get('Objects', 'TilesSheet'),
-                literal_eval(self.parser.get('Objects', 'TilesSize'))),
+                literal_eval(self.parser.get('Objects', 'TilesSize')),
+                self.parser.get('Objects', 'TilesFormat', fallback='alpha')),
             self.parser.get('Entities', 'TreesID'): (
                 self.parser.get('Entities', 'TreesSheet'),
-                literal_eval(self.parser.get('Entities', 'TreesSize'))),
+                literal_eval(self.parser.get('Entities', 'TreesSize')),
+                self.parser.get('Entities', 'TreesFormat', fallback='alpha')),
             self.parser.get('Entities', 'FishesID'): (
                 self.parser.get('Entities', 'FishesSheet'),
-                literal_eval(self.parser.get('Entities', 'FishesSize'))),
+                literal_eval(self.parser.get('Entities', 'FishesSize')),
+                self.parser.get('Entities', 'FishesFormat', fallback='alpha')),
             self.parser.get('Entities', 'RocksID'): (
                 self.parser.get('Entities', 'RocksSheet'),
-                literal_eval(self.parser.get('Entities', 'RocksSize'))),
+                literal_eval(self.parser.get('Entities', 'RocksSize')),
+                self.parser.get('Entities', 'RocksFormat', fallback='alpha')),
             self.parser.get('Entities', 'MountainID'): (
                 self.parser.get('Entities', 'MountainSheet'),
-                literal_eval(self.parser.get('Entities', 'MountainSize')))
+                literal_eval(self.parser.get('Entities', 'MountainSize')),
+                self.parser.get('Entities', 'MountainFormat', fallback='alpha')),
+            self.parser.get('Entities', 'BuildingsID'): (
+                self.parser.get('Entities', 'BuildingsSheet'),
+                literal_eval(self.parser.get('Entities', 'BuildingsSize')),
+                self.parser.get('Entities', 'BuildingsFormat', fallback='alpha'))
         }
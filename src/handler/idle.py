@@ -0,0 +1,44 @@
+""" This module provides event waiting for idle loops
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import pygame
+
+
+class IdleWaiter(object):
+    def __init__(self, clock: pygame.time.Clock, fps: int, timeout: int = 500, enabled: bool = True) -> None:
+        """ Paces a loop by its frame rate and blocks until the next event while it is idle.
+
+        :param clock: clock of the loop
+        :param fps: frame rate of active frames
+        :param timeout: maximal time an idle frame waits for an event, in milliseconds
+        :param enabled: paces idle frames like active ones if False
+        """
+        self.clock = clock
+        self.fps = fps
+        self.timeout = timeout
+        self.enabled = enabled
+        self.idle = False
+
+    def events(self, active: bool) -> list[pygame.event.Event] | None:
+        """ Waits for the next frame and returns its events.
+
+        :param active: paces the frame by the frame rate if True, waits for an event if False
+        :return: events of the frame, None if an idle frame timed out without events
+        """
+        was_idle = self.idle
+        self.idle = self.enabled and not active
+        if not self.idle or not was_idle:
+            self.clock.tick(self.fps)
+            return pygame.event.get()
+
+        event = pygame.event.wait(self.timeout)
+        # starts the frame after waiting, so the waiting time is not measured as work, and caps wake-ups by
+        # bursts of events at the frame rate
+        self.clock.tick(self.fps)
+        if event.type == pygame.NOEVENT:
+            return None
+
+        return [event] + pygame.event.get()
@@ -0,0 +1,74 @@
+""" This module provides parallel asset loading
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class AssetLoader(object):
+    def __init__(self, workers: int = None) -> None:
+        """ Creates an asset loader that runs decode jobs on a thread pool. pygame releases the GIL
+            while decoding images and sounds, so the jobs overlap on multi-core machines.
+
+        :param workers: number of worker threads, defaults to the executor's choice
+        """
+        self.workers = workers
+        self.timings = {}
+        self._executor = None
+        self._futures = []
+        self._start = None
+
+    def submit(self, name: str, func, *args, **kwargs) -> Future:
+        """ Submits a loading job to the thread pool.
+
+        :param name: name of the asset used for the timing report
+        :param func: callable that loads the asset
+        :param args: positional arguments of the callable
+        :param kwargs: keyword arguments of the callable
+        :return: future of the job
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='AssetLoader')
+            self._start = time.perf_counter()
+
+        future = self._executor.submit(self.__timed, name, func, *args, **kwargs)
+        self._futures.append(future)
+        return future
+
+    def wait(self) -> float:
+        """ Waits for all submitted jobs, logs the timings and shuts the thread pool down.
+            Reraises the first exception raised by a job.
+
+        :return: total wall time in seconds
+        """
+        if self._executor is None:
+            return 0.0
+
+        try:
+            for future in self._futures:
+                future.result()
+        finally:
+            self._executor.shutdown()
+            self._executor = None
+            self._futures.clear()
+
+        total = time.perf_counter() - self._start
+        work = sum(self.timings.values())
+        logging.info(f'Loaded {len(self.timings)} assets in {total * 1000:.1f} ms '
+                     f'({work * 1000:.1f} ms of decoding)')
+        return total
+
+    def __timed(self, name: str, func, *args, **kwargs):
+        """ Runs a job and records its duration.
+
+        :return: result of the job
+        """
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.timings[name] = time.perf_counter() - start
+        logging.debug(f'Loaded asset {name} in {self.timings[name] * 1000:.1f} ms')
+        return result
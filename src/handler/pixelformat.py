@@ -0,0 +1,120 @@
+""" This module provides the pixel format policy of all images that reach the display
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import logging
+import pygame
+
+OPAQUE = 'opaque'
+ALPHA = 'alpha'
+COLORKEY = 'colorkey'
+FORMATS = (OPAQUE, ALPHA, COLORKEY)
+
+
+def convert(image: pygame.Surface, pixel_format: str, colorkey: tuple[int, int, int] = None) -> pygame.Surface:
+    """ Converts an image to the display format of the given policy. Opaque images get the plain
+        display format, alpha images per-pixel alpha and colorkey images the display format with a
+        run-length encoded colorkey.
+
+    :param image: image to convert
+    :param pixel_format: OPAQUE | ALPHA | COLORKEY
+    :param colorkey: colorkey of COLORKEY images
+    :return: converted image
+    """
+    if pixel_format == ALPHA:
+        return image.convert_alpha()
+    if pixel_format == COLORKEY:
+        image = image.convert()
+        image.set_colorkey(colorkey, pygame.RLEACCEL)
+        return image
+    if pixel_format == OPAQUE:
+        return image.convert()
+
+    raise ValueError(f'Unknown pixel format: {pixel_format}')
+
+
+def surface(size: tuple[int, int], pixel_format: str = OPAQUE) -> pygame.Surface:
+    """ Creates an empty image in the display format of the given policy.
+
+    :param size: size of the image
+    :param pixel_format: OPAQUE | ALPHA
+    :return: new image
+    """
+    if pixel_format == ALPHA:
+        image = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+        image.fill((0, 0, 0, 0))
+        return image
+
+    return pygame.Surface(size).convert()
+
+
+def describe(image: pygame.Surface) -> tuple:
+    """ Describes the pixel format of an image.
+
+    :param image: image
+    :return: bit size, color masks and OPAQUE | ALPHA | COLORKEY
+    """
+    if image.get_flags() & pygame.SRCALPHA:
+        kind = ALPHA
+    elif image.get_colorkey() is not None:
+        kind = COLORKEY
+    else:
+        kind = OPAQUE
+
+    return image.get_bitsize(), image.get_masks()[:3], kind
+
+
+class BlitAudit(object):
+    def __init__(self) -> None:
+        """ Creates a blit audit that logs blits which need a pixel format conversion """
+        self.enabled = False
+        self.mismatches = {}
+
+    def check(self, source: pygame.Surface, dest: pygame.Surface, where: str) -> bool:
+        """ Checks if the color layout of a blit source differs from its destination. Every kind of
+            mismatch is logged once per blit site and counted afterwards.
+
+        :param source: source image
+        :param dest: destination image
+        :param where: name of the blit site
+        :return: True if the formats differ
+        """
+        # textures of render backends are converted once when they are uploaded
+        if not self.enabled or not isinstance(dest, pygame.Surface) or not isinstance(source, pygame.Surface):
+            return False
+
+        source_format = describe(source)
+        dest_format = describe(dest)
+        if source_format[:2] == dest_format[:2]:
+            return False
+
+        key = (where, source_format, dest_format)
+        if key not in self.mismatches:
+            self.mismatches[key] = 0
+            logging.warning(f'Blit format mismatch in {where}: {source_format} onto {dest_format}')
+        self.mismatches[key] += 1
+
+        return True
+
+    def check_all(self, sources, dest: pygame.Surface, where: str) -> int:
+        """ Checks a sequence of blit sources.
+
+        :param sources: images or sprites with an image
+        :param dest: destination image
+        :param where: name of the blit site
+        :return: number of mismatching sources
+        """
+        if not self.enabled:
+            return 0
+
+        count = 0
+        for source in sources:
+            image = source.image if isinstance(source, pygame.sprite.Sprite) else source
+            count += self.check(image, dest, where)
+
+        return count
+
+    def __str__(self):
+        return f'{len(self.mismatches)} kinds | {sum(self.mismatches.values())} blits'
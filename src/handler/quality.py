@@ -0,0 +1,93 @@
+""" This module provides adaptive quality handling
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import logging
+from collections import deque
+
+
+class QualityGovernor(object):
+    def __init__(self, levels: tuple, budget: float, min_level: int = 0, max_level: int = None,
+                 window: int = 60, cooldown: int = 120, down: float = 1.1, up: float = .7, settle: int = 2) -> None:
+        """ Creates a governor that steps through quality levels by the measured frame time. The quality
+            is lowered if the rolling average exceeds the budget and raised if it stays well below it.
+            The gap between both thresholds and a cooldown after each step keep it from oscillating.
+            The frames that apply a step, e.g. by building atlases and rasterizing terrain, are not measured,
+            so a step cannot trigger the next one.
+
+        :param levels: settings of each quality level, lowest quality first
+        :param budget: frame time budget in milliseconds
+        :param min_level: lowest level the governor may step down to
+        :param max_level: highest level the governor may step up to, the last level if None
+        :param window: number of frames of the rolling average
+        :param cooldown: number of frames without steps after a step
+        :param down: steps down if the average exceeds this part of the budget
+        :param up: steps up if the average is below this part of the budget
+        :param settle: number of frames after a step that are not measured
+        """
+        self.levels = levels
+        self.budget = budget
+        self.min_level = max(0, min_level)
+        self.max_level = len(levels) - 1 if max_level is None else min(max_level, len(levels) - 1)
+        self.down = down
+        self.up = up
+        self.cooldown = cooldown
+        self.settle = settle
+        self.level = self.max_level
+        self.average = 0.0
+        self._samples = deque(maxlen=window)
+        self._total = 0.0
+        self._hold = 0
+        self._skip = 0
+
+    @property
+    def settings(self) -> dict:
+        return self.levels[self.level]
+
+    def update(self, frame_time: float) -> bool:
+        """ Adds the work time of a frame and steps the quality level if needed.
+
+        :param frame_time: time the frame took without waiting, in milliseconds
+        :return: True if the level changed
+        """
+        if self._skip > 0:
+            self._skip -= 1
+            return False
+        if len(self._samples) == self._samples.maxlen:
+            self._total -= self._samples[0]
+        self._samples.append(frame_time)
+        self._total += frame_time
+        self.average = self._total / len(self._samples)
+
+        if self._hold > 0:
+            self._hold -= 1
+            return False
+        if len(self._samples) < self._samples.maxlen:
+            return False
+
+        if self.average > self.budget * self.down and self.level > self.min_level:
+            self.level -= 1
+        elif self.average < self.budget * self.up and self.level < self.max_level:
+            self.level += 1
+        else:
+            return False
+
+        logging.info(f'Quality level {self.level} at {self.average:.1f} ms per frame')
+        self.reset()
+        self._hold = self.cooldown
+        self._skip = self.settle
+
+        return True
+
+    def reset(self) -> None:
+        """ Forgets all measured frames, e.g. after a pause
+
+        :return: None
+        """
+        self._samples.clear()
+        self._total = 0.0
+
+    def __str__(self):
+        return f'{self.level} / {self.max_level} ({self.average:.1f} ms)'
@@ -9,14 +9,21 @@ import os
 
 
 class SoundHandler(object):
-    def __init__(self, path: str, auto_load: bool = True) -> None:
-        """ Creates a sound handler """
+    def __init__(self, path: str, auto_load: bool = True, loader=None, bundle=None) -> None:
+        """ Creates a sound handler
+
+        :param path: directory of the sound files
+        :param auto_load: loads the sounds on creation if True
+        :param loader: optional asset loader to decode the sounds in parallel
+        :param bundle: optional asset bundle with pre-converted sounds
+        """
         self.sounds = dict()
         self._volume = .6
         self.path = path
+        self.bundle = bundle
 
         if auto_load:
-            self.load()
+            self.load(loader)
 
     @property
     def volume(self) -> float:
@@ -29,9 +36,11 @@ class SoundHandler(object):
                 self.sounds[key].set_volume(value)
             self._volume = value
 
-    def load(self) -> None:
-        """ Loads the sounds into the dictionary
+    def load(self, loader=None) -> None:
+        """ Loads the sounds into the dictionary. If an asset loader is given, the sounds are
+            submitted to its thread pool and added as soon as they are decoded.
 
+        :param loader: optional asset loader
         :return: None
         """
         self.sounds.clear()
@@ -39,8 +48,22 @@ class SoundHandler(object):
             if filename.endswith(".wav") or filename.endswith(".mp3"):
                 file = filename
                 key = file[:len(file) - 4]
-                self.sounds[key] = pygame.mixer.Sound(f'{self.path}/{file}')
-                self.sounds[key].set_volume(self.volume)
+                load = pygame.mixer.Sound if self.bundle is None else self.bundle.load_sound
+                if loader is None:
+                    self.add(key, load(f'{self.path}/{file}'))
+                else:
+                    future = loader.submit(f'sound {file}', load, f'{self.path}/{file}')
+                    future.add_done_callback(lambda f, k=key: f.exception() or self.add(k, f.result()))
+
+    def add(self, key: str, sound: pygame.mixer.Sound) -> None:
+        """ Adds a sound with the current volume
+
+        :param key: key of the sound
+        :param sound: sound
+        :return: None
+        """
+        sound.set_volume(self.volume)
+        self.sounds[key] = sound
 
     def play(self, key: str) -> None:
         """ Plays specific sound
@@ -5,55 +5,258 @@
 :license: CC-BY-SA-4.0
 """
 import logging
+import threading
+from collections import OrderedDict
 import pygame
+from src.handler.assetcache import AssetCache
+from src.handler.bundle import AssetBundle
+import src.handler.pixelformat as pixelformat
+
+
+def scale(image: pygame.Surface, size: tuple[int, int]) -> pygame.Surface:
+    """ Scales an image, filtered if it is downscaled and its format allows it.
+
+    :param image: image to scale
+    :param size: new size
+    :return: scaled image
+    """
+    if image.get_size() == size:
+        return image
+    downscale = size[0] <= image.get_width() and size[1] <= image.get_height()
+    if downscale and image.get_colorkey() is None and image.get_bitsize() in (24, 32):
+        return pygame.transform.smoothscale(image, size)
+
+    return pygame.transform.scale(image, size)
 
 
 class SpriteSheet(object):
     def __init__(self, key: str, filename: str, sprite_size: tuple[int, int],
-                 colorkey: tuple[int, int, int] = None) -> None:
-        """ Creates a sprite sheet.
+                 colorkey: tuple[int, int, int] = None, pixel_format: str = pixelformat.ALPHA) -> None:
+        """ Creates a lazy sprite sheet. The image file is decoded on first access of the sheet,
+            its pattern or its sprites, or earlier by calling load().
 
         :param key: identfier of the sprite sheet
         :param filename: filename
         :param sprite_size: size of a single sprite
+        :param colorkey: colorkey of the sheet, makes it a COLORKEY sheet if given
+        :param pixel_format: pixel format policy of sheets without colorkey, OPAQUE | ALPHA
         """
-        # load from file or create an empty sheet
-        try:
-            self._sheet = pygame.image.load(filename).convert()
-        except FileNotFoundError as e:
-            logging.error(e)
-            self._sheet = pygame.Surface((0, 0))
-
         # basic settings
         self._key = key
-        self._sheet_size = self.sheet.get_size()
+        self._filename = filename
+        self._sheet = None
+        self._sheet_size = None
         self._sprite_size = sprite_size
-        self.pattern = self.__generate_pattern()
+        self._pattern = {}
+        self._sprites = {}
         self._colorkey = colorkey
+        self._pixel_format = pixel_format
+        self._mipmaps = {}
+        self._lock = threading.RLock()
+        self.asset_cache = None
+        self.bundle = None
 
     @property
     def key(self) -> str:
         return self._key
 
+    @property
+    def filename(self) -> str:
+        return self._filename
+
+    @property
+    def loaded(self) -> bool:
+        return self._sheet is not None
+
     @property
     def sheet(self) -> pygame.Surface:
+        self.load()
         return self._sheet
 
     @property
     def sheet_size(self) -> tuple[int, int]:
+        if self._sheet_size is None:
+            self.load()
         return self._sheet_size
 
     @property
     def sprite_size(self) -> tuple[int, int]:
         return self._sprite_size
 
+    @property
+    def pattern(self) -> dict:
+        if self._sheet_size is None:
+            self.load()
+        return self._pattern
+
+    @property
+    def sprites(self) -> dict:
+        self.load()
+        return self._sprites
+
     @property
     def colorkey(self) -> tuple[int, int, int]:
         return self._colorkey
 
     @colorkey.setter
     def colorkey(self, value) -> None:
+        if self.loaded and self.pixel_format != (pixelformat.COLORKEY if value is not None else self._pixel_format):
+            raise ValueError(f'Pixel format of loaded sprite sheet {self.key} cannot be changed.')
         self._colorkey = value
+        for sprite in self._sprites.values():
+            sprite.set_colorkey(self._colorkey)
+
+    @property
+    def pixel_format(self) -> str:
+        if self._colorkey is not None:
+            return pixelformat.COLORKEY
+        return self._pixel_format
+
+    def load(self) -> None:
+        """ Decodes the image file and creates the pattern and sprite views, if not done yet.
+            Safe to be called from a background thread.
+
+        :return: None
+        """
+        if self._sheet is not None:
+            return
+
+        with self._lock:
+            if self._sheet is not None:
+                return
+
+            # load from asset bundle, asset cache, from file or create an empty sheet
+            try:
+                sheet = self.__load_bundled()
+                if sheet is None:
+                    sheet = self.__load_cached()
+                if sheet is None:
+                    sheet = pixelformat.convert(pygame.image.load(self.filename), self.pixel_format, self.colorkey)
+                    stamp = self.stamp() if self.asset_cache is not None else None
+                    if stamp is not None:
+                        self.asset_cache.store(f'sheet_{self.key}', stamp, sheet)
+            except FileNotFoundError as e:
+                logging.error(e)
+                sheet = pygame.Surface((0, 0))
+            if sheet.get_size() == (0, 0):
+                logging.error(f'Sprite sheet {self.key} is empty.')
+
+            self._sheet_size = sheet.get_size()
+            self._pattern = self.__generate_pattern()
+            self._sprites = self.__generate_sprites(sheet)
+            self._sheet = sheet
+
+    def mipmap(self, index: int, size: tuple[int, int]) -> pygame.Surface:
+        """ Returns the smallest mipmap level of a sprite that is at least as large as the given size.
+            Levels halve the sprite size and are created on first use from the next larger level.
+            Sprites of sheets with a colorkey are not filtered and always return the full size.
+
+        :param index: sprite index
+        :param size: size the sprite gets scaled to
+        :return: read-only image of the mipmap level
+        """
+        level = 0
+        width, height = self.sprite_size
+        if self.colorkey is None:
+            while size[0] <= width // 2 and size[1] <= height // 2 and min(width, height) > 1:
+                width, height = width // 2, height // 2
+                level += 1
+
+        with self._lock:
+            return self.__mipmap_level(index, level)
+
+    def __mipmap_level(self, index: int, level: int) -> pygame.Surface:
+        """ Returns a mipmap level of a sprite and creates the missing levels above it.
+
+        :param index: sprite index
+        :param level: mipmap level, 0 is the full size sprite
+        :return: image of the mipmap level
+        """
+        if level == 0:
+            return self.sprites[index]
+        if (index, level) not in self._mipmaps:
+            source = self.__mipmap_level(index, level - 1)
+            size = (max(1, source.get_width() // 2), max(1, source.get_height() // 2))
+            self._mipmaps[(index, level)] = scale(source, size)
+
+        return self._mipmaps[(index, level)]
+
+    def release(self) -> None:
+        """ Drops the full size sheet and its sprite views from memory, but keeps the created mipmap
+            levels. The sheet gets decoded again if full size sprites are needed later.
+
+        :return: None
+        """
+        with self._lock:
+            if self._sheet is not None:
+                self._sheet = None
+                self._sprites = {}
+                logging.debug(f'Released sprite sheet {self.key} ({len(self._mipmaps)} mipmaps kept)')
+
+    def stamp(self) -> str | None:
+        """ Returns the asset cache stamp of the sheet.
+
+        :return: stamp of the image file and the target format or None if the image file does not exist
+        """
+        file_stamp = self.asset_cache.file_stamp(self.filename)
+        if file_stamp is None:
+            return None
+        return self.asset_cache.stamp(file_stamp, self.pixel_format)
+
+    @property
+    def bundle_name(self) -> str:
+        return f'sheet:{self.filename}'
+
+    def bundle_stamp(self) -> str | None:
+        """ Returns the asset bundle stamp of the sheet.
+
+        :return: stamp of the image file and the pixel format policy
+        """
+        return AssetBundle.stamp(self.filename, self.pixel_format)
+
+    def __load_bundled(self) -> pygame.Surface | None:
+        """ Loads the pre-converted sheet from the asset bundle.
+
+        :return: sheet image or None if it is not bundled
+        """
+        if not self.bundle:
+            return None
+        bundled = self.bundle.image(self.bundle_name, self.bundle_stamp())
+        if bundled is None:
+            return None
+
+        return bundled[0]
+
+    def __load_cached(self) -> pygame.Surface | None:
+        """ Loads the decoded sheet from the asset cache.
+
+        :return: sheet image or None if it is not cached
+        """
+        if self.asset_cache is None:
+            return None
+        stamp = self.stamp()
+        if stamp is None:
+            return None
+        cached = self.asset_cache.load(f'sheet_{self.key}', stamp)
+        if cached is None:
+            return None
+
+        return cached[0]
+
+    def __generate_sprites(self, sheet: pygame.Surface) -> dict:
+        """ Creates a subsurface view for every sprite of the pattern. Views share their pixels with
+            the sheet, so they are read-only for all callers.
+
+        :param sheet: decoded sheet image
+        :return: sprite views with their index as key
+        """
+        sprites = {}
+        for index, rect in self._pattern.items():
+            sprite = sheet.subsurface(rect)
+            sprite.set_colorkey(self.colorkey)
+            sprites[index] = sprite
+
+        return sprites
 
     def __generate_pattern(self) -> dict:
         """ Generates a sprite sheet pattern with keys as identifier.
@@ -62,7 +265,7 @@ class SpriteSheet(object):
         """
         pattern = {}
         sprite_width, sprite_height = self.sprite_size  # 128, 64
-        sheet_width, sheet_height = self.sheet_size  # 1024, 384
+        sheet_width, sheet_height = self._sheet_size  # 1024, 384
         sprites_per_col = sheet_width // sprite_width  # 8
         sprites_per_row = sheet_height // sprite_height  # 6
         index = pos_x = pos_y = 0
@@ -82,51 +285,210 @@ class SpriteSheet(object):
         return True
 
 
+class SpriteCache(object):
+    def __init__(self, max_bytes: int) -> None:
+        """ Creates a least recently used cache for scaled and converted sprite images.
+
+        :param max_bytes: memory cap of all cached images in bytes
+        """
+        self._images = OrderedDict()
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value: int) -> None:
+        self._max_bytes = value
+        self.evict()
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: tuple) -> pygame.Surface | None:
+        """ Returns a cached image and marks it as recently used.
+
+        :param key: cache key
+        :return: cached image or None if key is not cached
+        """
+        image = self._images.get(key)
+        if image is None:
+            self.misses += 1
+            return None
+
+        self._images.move_to_end(key)
+        self.hits += 1
+
+        return image
+
+    def put(self, key: tuple, image: pygame.Surface) -> None:
+        """ Adds an image to the cache and evicts least recently used images if the cap is exceeded.
+
+        :param key: cache key
+        :param image: image to cache
+        :return: None
+        """
+        if key in self._images:
+            self._bytes -= self.image_bytes(self._images.pop(key))
+        self._images[key] = image
+        self._bytes += self.image_bytes(image)
+        self.evict()
+
+    def evict(self) -> None:
+        """ Drops least recently used images until the cache fits into its memory cap.
+
+        :return: None
+        """
+        while self._bytes > self._max_bytes and self._images:
+            key, image = self._images.popitem(last=False)
+            self._bytes -= self.image_bytes(image)
+
+    def clear(self) -> None:
+        """ Removes all images from the cache and resets its counters.
+
+        :return: None
+        """
+        self._images.clear()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def image_bytes(image: pygame.Surface) -> int:
+        """ Returns the amount of pixel memory of an image.
+
+        :param image: image
+        :return: size in bytes
+        """
+        return image.get_pitch() * image.get_height()
+
+    def __len__(self):
+        return len(self._images)
+
+    def __str__(self):
+        return f'{self.hits} hits | {self.misses} misses | {len(self)} images | {self.bytes // 1024} KiB'
+
+
 class SpriteSheetHandler(object):
-    def __init__(self):
-        """ Creates a sprite sheet handler """
-        self._sheets = []
+    def __init__(self, cache_size: int = 32 * 1024 * 1024, asset_cache: AssetCache = None,
+                 bundle: AssetBundle = None):
+        """ Creates a sprite sheet handler
+
+        :param cache_size: memory cap of the scaled sprite cache in bytes
+        :param asset_cache: optional on-disk cache of decoded sheets
+        :param bundle: optional asset bundle with pre-converted sheets
+        """
+        self._sheets = {}
+        self.cache = SpriteCache(cache_size)
+        self.asset_cache = asset_cache
+        self.bundle = bundle
 
     @property
-    def sheets(self) -> list:
+    def sheets(self) -> dict:
         return self._sheets
 
-    @sheets.setter
-    def sheets(self, sheet) -> None:
-        self._sheets.append(sheet)
-
     def add(self, sheet: SpriteSheet) -> None:
-        """ Adds a new sprite sheet to the handler.
+        """ Adds a new sprite sheet to the handler. The sheet gets decoded on first use.
 
         :param sheet: sprite sheet object
         :return: None
         """
-        for sh in self.sheets:
-            if sh.key == sheet.key:
-                logging.error('Key of given sprite sheet already exists. Not added.')
-        self.sheets = sheet
-        if not sheet:
-            logging.error('Given sheet is empty. Loaded it anyway.')
+        if sheet.key in self.sheets:
+            logging.error('Key of given sprite sheet already exists. Not added.')
+            return
+        sheet.asset_cache = self.asset_cache
+        sheet.bundle = self.bundle
+        self.sheets[sheet.key] = sheet
+
+    def prefetch(self, keys: list = None, callback=None) -> threading.Thread:
+        """ Decodes sprite sheets on a background thread.
+
+        :param keys: keys of the sprite sheets to decode, all sheets if None
+        :param callback: optional function that is called on the thread after all sheets are decoded
+        :return: the started thread
+        """
+        if keys is None:
+            keys = list(self.sheets.keys())
+        sheets = [self.get(key) for key in keys]
+
+        def run():
+            for sheet in sheets:
+                sheet.load()
+            logging.info(f'Prefetched sprite sheets: {", ".join(keys)}')
+            if callback is not None:
+                callback()
+
+        thread = threading.Thread(target=run, name='SpriteSheetPrefetch', daemon=True)
+        thread.start()
+
+        return thread
+
+    def get(self, key: str) -> SpriteSheet:
+        """ Returns the sprite sheet by its key.
+
+        :param key: sprite sheet key
+        :return: sprite sheet
+        """
+        try:
+            return self.sheets[key]
+        except KeyError:
+            raise KeyError(f'Given key does not exists: {key}')
+
+    def sprite(self, key: str, index: int) -> pygame.Surface:
+        """ Returns a zero-copy view of the sprite by its sprite sheet key and sprite index.
+            The view shares its pixels with the sprite sheet and must not be modified.
+
+        :param key: sprite sheet key
+        :param index: sprite index
+        :return: read-only view of the sprite
+        """
+        return self.get(key).sprites[index]
 
     def image_by_index(self, key: str, index: int) -> pygame.Surface:
-        """ Returns the sprite image by its sprite sheet key and sprite index.
+        """ Returns a copy of the sprite image by its sprite sheet key and sprite index.
+            Use sprite() if the image is not modified.
 
         :param key: sprite sheet key
         :param index: sprite index
         :return: image of the sprite
         """
-        # check if key is in list
-        sheet = None
-        for sh in self.sheets:
-            if sh.key == key:
-                sheet = sh
-        if sheet is None:
-            raise KeyError(f'Given key does not exists: {key}')
-        # get image
-        rect = pygame.Rect(sheet.pattern[index])
-        image = pygame.Surface(rect.size).convert()
-        image.blit(sheet.sheet, (0, 0), rect)
-        image.set_colorkey(sheet.colorkey, pygame.RLEACCEL)
+        sheet = self.get(key)
+
+        return pixelformat.convert(sheet.sprites[index], sheet.pixel_format, sheet.colorkey)
+
+    def sprite_size(self, key: str) -> tuple[int, int]:
+        """ Returns the size of a single sprite of a sprite sheet.
+
+        :param key: sprite sheet key
+        :return: size of a single sprite
+        """
+        return self.get(key).sprite_size
+
+    def scaled_image(self, key: str, index: int, size: tuple[int, int] = None) -> pygame.Surface:
+        """ Returns a scaled sprite image, display converted by the pixel format policy of its sheet.
+            Images are shared between all callers and must not be modified. Use image_by_index() to get
+            an image of your own.
+
+        :param key: sprite sheet key
+        :param index: sprite index
+        :param size: size of the returned image, sprite size if None
+        :return: scaled image of the sprite
+        """
+        cache_key = (key, index, size)
+        image = self.cache.get(cache_key)
+        if image is None:
+            sheet = self.get(key)
+            if size is None:
+                image = sheet.sprites[index]
+            else:
+                image = scale(sheet.mipmap(index, size), size)
+            image = pixelformat.convert(image, sheet.pixel_format, sheet.colorkey)
+            self.cache.put(cache_key, image)
 
         return image
 
@@ -38,6 +38,10 @@ lang_de = {
     'info_date': "Datum",
     'info_ingame_time': "In-Game Zeit",
     'info_fps': "FPS",
+    'info_sprite_cache': "Sprite Cache",
+    'info_entities': "Gezeichnete Objekte",
+    'info_quality': "Qualitätsstufe",
+    'info_blit_audit': "Blit-Formatfehler",
     'info_version': "Version",
     'msg_cap_leaveeditor': "Editor verlassem...",
     'msg_text_leaveeditor': "Bist Du sicher?",
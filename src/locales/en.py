@@ -38,6 +38,10 @@ lang_en = {
     'info_date': "Datum",
     'info_ingame_time': "In-Game time",
     'info_fps': "FPS",
+    'info_sprite_cache': "Sprite cache",
+    'info_entities': "Entities drawn",
+    'info_quality': "Quality level",
+    'info_blit_audit': "Blit format mismatches",
     'info_version': "Version",
     'msg_cap_leaveeditor': "Leaving the editor...",
     'msg_text_leaveeditor': "Are you sure?",
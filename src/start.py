@@ -8,8 +8,10 @@ import pygame
 import logging
 from datetime import datetime
 import src.locales as locales
-from src.handler import RESA_CH, RESA_SSH, RESA_GSH, RESA_SH, RESA_MH, RESA_EH
+from src.handler.idle import IdleWaiter
+from src.handler import RESA_CH, RESA_SSH, RESA_AH, RESA_GSH, RESA_SH, RESA_MH, RESA_EH, RESA_BUNDLE
 import src.ui.display
+import src.ui.backend
 from src.ui.editor import Editor
 from src.ui.form import MessageHandler
 from src.ui.titles import MainMenu, Options
@@ -25,14 +27,17 @@ class Start(object):
 
         # set timers and clocks
         self.clock = pygame.time.Clock()
+        self.waiter = IdleWaiter(self.clock, RESA_CH.fps, RESA_CH.idle_timeout, RESA_CH.idle_wait)
 
-        # build window
+        # build window, the whole display is rendered at render scale if configured
+        self.ui_scale = RESA_CH.render_scale if RESA_CH.render_scale_ui else 1.0
         resos = src.ui.display.get_screenmodes()
-        self.surface = pygame.display.set_mode(resos['win'][-1])
-        pygame.display.set_icon(pygame.image.load(RESA_CH.icon).convert())
+        self.renderer = RESA_CH.render_backend == src.ui.backend.RENDERER
+        self.surface = src.ui.display.set_mode(resos['win'][-1], render_scale=self.ui_scale, renderer=self.renderer)
+        pygame.display.set_icon(RESA_BUNDLE.load_image(RESA_CH.icon))
         pygame.display.set_caption(f"{locales.get('info_welcome')} {RESA_CH.title}")
-        self.resolution_buffer = pygame.display.get_surface().get_size()
-        self.resolution = pygame.display.get_surface().get_size()
+        self.resolution_buffer = resos['win'][-1]
+        self.resolution = resos['win'][-1]
 
         # create titles
         self.title_main = MainMenu(RESA_SSH, RESA_CH.sp_menu_btn_key)
@@ -41,6 +46,10 @@ class Start(object):
         # messages
         self.messages = MessageHandler(RESA_SSH, RESA_CH.sp_menu_btn_key)
 
+        # decode world sprites and build their atlas while the main menu is shown
+        if RESA_CH.prefetch_sprites:
+            RESA_SSH.prefetch(RESA_AH.keys, lambda: RESA_AH.build(RESA_CH.grid_zoom))
+
         # start the game loop
         self.game = None
         self.loop()
@@ -53,19 +62,24 @@ class Start(object):
         RESA_MH.start(RESA_CH.volume)
 
         while not RESA_GSH.leave_game:
-            self.clock.tick(RESA_CH.fps)
-            self.handle_events()
+            # the menu is only rendered again after input, while info boxes move or a game or editor starts or ends
+            events = self.waiter.events(self.messages.is_animating() or
+                                        RESA_GSH.start_game or RESA_GSH.start_editor)
+            if events is None:
+                continue
+            self.handle_events(events)
             self.run_logic()
             self.render()
 
         self.exit()
 
-    def handle_events(self) -> None:
+    def handle_events(self, events: list[pygame.event.Event]) -> None:
         """ Handles all events
 
+        :param events: events of the frame
         :return: None
         """
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 RESA_GSH.leave_game = True
             elif event.type == RESA_EH.RESA_TITLE_EVENT:
@@ -127,11 +141,12 @@ class Start(object):
                 self.editor = None
             else:
                 # store current display settings, create new display and start editor
-                self.resolution_buffer = (pygame.display.get_surface().get_size(), RESA_CH.fullscreen)
+                self.resolution_buffer = (self.resolution, RESA_CH.fullscreen)
                 self.resolution = (1280, 960)
                 RESA_CH.fullscreen = False
                 pygame.display.set_caption(f"{locales.get('info_editor_title')} {RESA_CH.title}")
-                self.update_display()
+                # the editor is laid out for its full resolution
+                self.update_display(False)
                 self.editor = Editor()
         elif RESA_GSH.start_game:
             # current game play ended and back to main menu
@@ -191,18 +206,17 @@ class Start(object):
         self.messages.info(f"{locales.get('info_screenshot')}: {filename}")
         logging.info('Took screenshot')
 
-    def update_display(self):
+    def update_display(self, scaled: bool = True):
         """ Reloads the display and re-builds the interfaces.
 
+        :param scaled: renders the display at the configured render scale if True
         :return: None
         """
-        if RESA_CH.fullscreen:
-            self.surface = pygame.display.set_mode(self.resolution, pygame.FULLSCREEN)
-        else:
-            self.surface = pygame.display.set_mode(self.resolution)
+        self.surface = src.ui.display.set_mode(self.resolution, RESA_CH.fullscreen, self.ui_scale if scaled else 1.0,
+                                               self.renderer)
 
         # re-build interfaces
-        self.title_main.rect = pygame.Rect((0, 0), self.resolution)
+        self.title_main.rect = self.surface.get_rect()
         self.title_main.build()
-        self.title_options.rect = pygame.Rect((0, 0), self.resolution)
+        self.title_options.rect = self.surface.get_rect()
         self.title_options.build()
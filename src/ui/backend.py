@@ -0,0 +1,318 @@
+""" This module provides the render backends of the game display
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import logging
+import weakref
+import pygame
+import src.handler.pixelformat as pixelformat
+
+try:
+    from pygame._sdl2 import video
+except ImportError:
+    video = None
+
+SURFACE = 'surface'
+RENDERER = 'renderer'
+BACKENDS = (SURFACE, RENDERER)
+
+
+class SurfaceBackend(object):
+    name = SURFACE
+    # canvases have to be scaled to their screen size before they are shown
+    scales = False
+
+    def __init__(self) -> None:
+        """ Composes the display with software blits on the display surface """
+
+    def canvas(self, size: tuple[int, int]) -> pygame.Surface:
+        """ Creates a surface the map is rendered on.
+
+        :param size: size of the canvas
+        :return: canvas
+        """
+        return pixelformat.surface(size)
+
+    def surface(self) -> pygame.Surface:
+        """ Returns the surface the interfaces are rendered on.
+
+        :return: display surface
+        """
+        return pygame.display.get_surface()
+
+    def blit_map(self, surface: pygame.Surface, canvas: pygame.Surface, rect: pygame.Rect) -> None:
+        """ Shows a canvas on an area of the interface surface.
+
+        :param surface: interface surface
+        :param canvas: canvas in the size of the area
+        :param rect: area on the interface surface
+        :return: None
+        """
+        surface.blit(canvas, rect)
+
+    def flatten(self, surface: pygame.Surface) -> None:
+        """ Draws the shown canvases onto the interface surface, which is already the case for software blits.
+
+        :param surface: interface surface
+        :return: None
+        """
+
+    def present(self, rects: list[pygame.Rect] = None) -> None:
+        """ Shows the changed areas of the display.
+
+        :param rects: changed areas, the whole display if None
+        :return: None
+        """
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+    def snapshot(self) -> pygame.Surface:
+        """ Returns the current content of the display.
+
+        :return: display surface
+        """
+        return pygame.display.get_surface()
+
+
+class TextureCanvas(object):
+    def __init__(self, backend, size: tuple[int, int]) -> None:
+        """ Creates a render target texture that can be drawn on like a surface.
+
+        :param backend: renderer backend
+        :param size: size of the canvas
+        """
+        self.backend = backend
+        self.renderer = backend.renderer
+        self.texture = video.Texture(self.renderer, size, target=True)
+        self.size = tuple(size)
+
+    def get_size(self) -> tuple[int, int]:
+        return self.size
+
+    def get_width(self) -> int:
+        return self.size[0]
+
+    def get_height(self) -> int:
+        return self.size[1]
+
+    def get_rect(self) -> pygame.Rect:
+        return pygame.Rect((0, 0), self.size)
+
+    def fill(self, color, rect: pygame.Rect = None) -> None:
+        """ Fills the canvas or an area of it with a color.
+
+        :param color: color
+        :param rect: area, the whole canvas if None
+        :return: None
+        """
+        self.__target()
+        self.renderer.draw_color = pygame.Color(color)
+        if rect is None:
+            self.renderer.clear()
+        else:
+            self.renderer.fill_rect(rect)
+
+    def blit(self, source: pygame.Surface, dest, area: pygame.Rect = None) -> None:
+        """ Draws a source image like Surface.blit.
+
+        :param source: source image
+        :param dest: position or rect of the top left corner
+        :param area: part of the source, the whole source if None
+        :return: None
+        """
+        self.__target()
+        self.__draw(source, dest, area)
+
+    def blits(self, sequence, doreturn: bool = True) -> None:
+        """ Draws a sequence of source images like Surface.blits.
+
+        :param sequence: source images, positions and optional areas
+        :param doreturn: ignored, nothing is returned
+        :return: None
+        """
+        self.__target()
+        draw = self.__draw
+        for blit in sequence:
+            draw(*blit)
+
+    def read(self) -> pygame.Surface:
+        """ Reads the canvas back into a surface. Slow, for single frames only.
+
+        :return: surface with the content of the canvas
+        """
+        self.__target()
+        surface = pygame.Surface(self.size, 0, 32)
+        self.renderer.to_surface(surface)
+        self.renderer.target = None
+
+        return surface
+
+    def __target(self) -> None:
+        """ Makes the canvas the target of the renderer
+
+        :return: None
+        """
+        if self.renderer.target is not self.texture:
+            self.renderer.target = self.texture
+
+    def __draw(self, source: pygame.Surface, dest, area: pygame.Rect = None) -> None:
+        """ Draws a source image on the current target.
+
+        :param source: source image
+        :param dest: position or rect of the top left corner
+        :param area: part of the source, the whole source if None
+        :return: None
+        """
+        texture, (offset_x, offset_y) = self.backend.texture(source)
+        if area is None:
+            src = pygame.Rect((offset_x, offset_y), source.get_size())
+        else:
+            src = pygame.Rect(area).clip(source.get_rect()).move(offset_x, offset_y)
+        if src.width and src.height:
+            texture.draw(srcrect=src, dstrect=(dest[0], dest[1], src.width, src.height))
+
+
+class RendererBackend(object):
+    name = RENDERER
+    scales = True
+
+    def __init__(self, renderer) -> None:
+        """ Composes the display with the SDL renderer of the window.
+
+        :param renderer: renderer of the display window
+        """
+        self.renderer = renderer
+        self.textures = weakref.WeakKeyDictionary()
+        size = pygame.display.get_surface().get_size()
+        self.layer = pygame.Surface(size, pygame.SRCALPHA)
+        self.layer.fill((0, 0, 0, 0))
+        self._layer_texture = video.Texture(renderer, size, streaming=True)
+        self._layer_texture.blend_mode = pygame.BLENDMODE_BLEND
+        self._map = None
+        self._uploaded = False
+
+    def texture(self, image: pygame.Surface) -> tuple:
+        """ Returns the texture of the parent surface of an image and uploads it on first use.
+
+        :param image: image or subsurface
+        :return: texture and position of the image on it
+        """
+        parent = image.get_abs_parent()
+        texture = self.textures.get(parent)
+        if texture is None:
+            texture = self.textures[parent] = video.Texture.from_surface(self.renderer, parent)
+
+        return texture, image.get_abs_offset()
+
+    def canvas(self, size: tuple[int, int]) -> TextureCanvas:
+        """ Creates a canvas texture the map is rendered on.
+
+        :param size: size of the canvas
+        :return: canvas
+        """
+        return TextureCanvas(self, size)
+
+    def surface(self) -> pygame.Surface:
+        """ Returns the transparent layer the interfaces are rendered on.
+
+        :return: interface layer
+        """
+        return self.layer
+
+    def blit_map(self, surface: pygame.Surface, canvas: TextureCanvas, rect: pygame.Rect) -> None:
+        """ Shows a canvas scaled to an area under the interface layer and clears the area of the layer.
+
+        :param surface: interface layer
+        :param canvas: canvas
+        :param rect: area on the display
+        :return: None
+        """
+        surface.fill((0, 0, 0, 0), rect)
+        self._map = (canvas, pygame.Rect(rect))
+        # the window is the target again, e.g. for pygame.display.flip of loading screens and menus
+        self.renderer.target = None
+
+    def flatten(self, surface: pygame.Surface) -> None:
+        """ Reads the shown canvas back into its area of the interface layer, e.g. to keep a still frame.
+
+        :param surface: interface layer
+        :return: None
+        """
+        if self._map is not None:
+            canvas, rect = self._map
+            surface.blit(pygame.transform.scale(canvas.read(), rect.size), rect)
+            self._map = None
+
+    def present(self, rects: list[pygame.Rect] = None) -> None:
+        """ Uploads the changed areas of the interface layer and draws the canvas and the layer to the window.
+
+        :param rects: changed areas, the whole display if None
+        :return: None
+        """
+        bounds = self.layer.get_rect()
+        if rects is None or not self._uploaded:
+            self._layer_texture.update(self.layer)
+            self._uploaded = True
+        else:
+            for rect in rects:
+                rect = bounds.clip(rect)
+                if rect:
+                    self._layer_texture.update(self.layer.subsurface(rect), rect)
+
+        self.renderer.target = None
+        self.__compose()
+        self.renderer.present()
+
+    def snapshot(self) -> pygame.Surface:
+        """ Composes the current frame on a texture and reads it back.
+
+        :return: surface with the content of the display
+        """
+        target = video.Texture(self.renderer, self.layer.get_size(), target=True)
+        self.renderer.target = target
+        self.__compose()
+        surface = pygame.Surface(self.layer.get_size(), 0, 32)
+        self.renderer.to_surface(surface)
+        self.renderer.target = None
+
+        return surface
+
+    def __compose(self) -> None:
+        """ Draws the shown canvas and the interface layer on the current target
+
+        :return: None
+        """
+        self.renderer.draw_color = pygame.Color(0, 0, 0)
+        self.renderer.clear()
+        if self._map is not None:
+            canvas, rect = self._map
+            canvas.texture.draw(dstrect=rect)
+        self._layer_texture.draw()
+
+
+def create(name: str):
+    """ Creates a render backend. The renderer backend needs a display created with an SDL renderer and
+        falls back to software blits if there is none.
+
+    :param name: SURFACE | RENDERER
+    :return: render backend
+    """
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown render backend: {name}')
+
+    if name == RENDERER:
+        if video is None:
+            logging.warning('Render backend renderer needs pygame._sdl2, using surface')
+        else:
+            try:
+                renderer = video.Renderer.from_window(video.Window.from_display_module())
+                logging.info('Render backend: renderer')
+                return RendererBackend(renderer)
+            except pygame.error as e:
+                logging.warning(f'Render backend renderer not available, using surface: {e}')
+
+    return SurfaceBackend()
@@ -5,6 +5,10 @@
 :license: CC-BY-SA-4.0
 """
 import pygame
+from src.handler import RESA_AH
+
+# True if the current display was created with an SDL renderer
+_scaled = False
 
 
 def get_screenmodes():
@@ -40,3 +44,37 @@ def get_screenmodes():
         screenmodes['win'].append((800, 600))
 
     return screenmodes
+
+
+def set_mode(resolution: tuple[int, int], fullscreen: bool = False, render_scale: float = 1.0,
+             renderer: bool = False) -> pygame.Surface:
+    """ Creates the display. With a render scale below 1 the display surface gets smaller and SDL scales
+        it up to the window, so everything is drawn with fewer pixels. Windows are scaled by whole numbers.
+
+    :param resolution: size of the window
+    :param fullscreen: creates a fullscreen display if True
+    :param render_scale: resolution of the display surface relative to the window
+    :param renderer: creates the window with an SDL renderer, which render backends can draw with, if True
+    :return: display surface
+    """
+    flags = pygame.FULLSCREEN if fullscreen else 0
+    if renderer:
+        flags |= pygame.SCALED
+    if render_scale < 1:
+        flags |= pygame.SCALED
+        resolution = (max(1, round(resolution[0] * render_scale)), max(1, round(resolution[1] * render_scale)))
+
+    global _scaled
+    if bool(flags & pygame.SCALED) == _scaled:
+        return pygame.display.set_mode(resolution, flags)
+
+    # SDL can not add a renderer to an existing window or remove it, so the window is created again while
+    # no atlas is converted to its display format
+    RESA_AH.pause()
+    pygame.display.quit()
+    pygame.display.init()
+    _scaled = bool(flags & pygame.SCALED)
+    surface = pygame.display.set_mode(resolution, flags)
+    RESA_AH.resume()
+
+    return surface
@@ -8,6 +8,7 @@ import logging
 import pickle
 import pygame
 from src.handler import RESA_CH, RESA_SSH, RESA_SH, RESA_EH
+from src.handler.idle import IdleWaiter
 from datetime import datetime
 import src.ui.form as forms
 import src.locales as locales
@@ -31,7 +32,10 @@ class PaletteField(pygame.sprite.Sprite):
         self.tile = tile
 
         # image and sprite settings
-        self.image = pygame.transform.scale(image, self.size).convert_alpha()
+        if image.get_size() == self.size:
+            self.image = image
+        else:
+            self.image = pygame.transform.scale(image, self.size).convert_alpha()
 
         # positions
         self.position = position
@@ -80,6 +84,7 @@ class Editor(object):
 
         # set timers and clocks
         self.clock = pygame.time.Clock()
+        self.waiter = IdleWaiter(self.clock, RESA_CH.fps, RESA_CH.idle_timeout, RESA_CH.idle_wait)
 
         # set handler
         self.messages = forms.MessageHandler(RESA_SSH, RESA_CH.sp_menu_btn_key)
@@ -90,7 +95,7 @@ class Editor(object):
 
         # load palette
         for key, value in self.palette.items():
-            image = RESA_SSH.image_by_index('Tiles', key)
+            image = RESA_SSH.scaled_image('Tiles', key, (44, 44))
             field = PaletteField(key, 44, (int(value[0]), int(value[1])), image)
             self.palette_sprites.add(field)
 
@@ -100,8 +105,9 @@ class Editor(object):
         RESA_CH.grid = src.world.grid.Grid(44, 44, 20)
 
         # fill grid with water tiles
+        field_size = (RESA_CH.grid.iso_width, RESA_CH.grid.iso_height)
         for key, value in RESA_CH.grid.fields_iso.items():
-            image = RESA_SSH.image_by_index('Tiles', 2)
+            image = RESA_SSH.scaled_image('Tiles', 2, field_size)
             new_field = Field((self.shift_x + value.rect.x, self.shift_y + value.rect.y), image)
             new_field.sprite_sheet_id = 'Tiles'
             new_field.sprite_id = 2
@@ -117,17 +123,21 @@ class Editor(object):
         :return: None
         """
         while not self.exit:
-            self.clock.tick(RESA_CH.fps)
-            self.handle_events()
+            # the editor is only rendered again after input or while info boxes move
+            events = self.waiter.events(self.messages.is_animating())
+            if events is None:
+                continue
+            self.handle_events(events)
             self.run_logic()
             self.render()
 
-    def handle_events(self) -> None:
+    def handle_events(self, events: list[pygame.event.Event]) -> None:
         """ Handles all editor events
 
+        :param events: events of the frame
         :return: None
         """
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 self.leave_editor()
             elif event.type == pygame.KEYUP:
@@ -178,9 +188,7 @@ class Editor(object):
             if self.selected_tile:
                 for field in self.fields:
                     if field.iso_key == self.place_tile.key:
-                        field.image = pygame.transform.scale(
-                            RESA_SSH.image_by_index('Tiles', self.selected_tile),
-                            field.size).convert_alpha()
+                        field.image = RESA_SSH.scaled_image('Tiles', self.selected_tile, field.size)
                         field.sprite_id = self.selected_tile
 
             self.place_tile = False
@@ -255,8 +263,9 @@ class Editor(object):
         :return: None
         """
         self.fields.empty()
+        field_size = (RESA_CH.grid.iso_width, RESA_CH.grid.iso_height)
         for field_data in pickle.load(open('data/saves/data.island', 'rb')):
-            image = RESA_SSH.image_by_index(field_data.sprite_sheet, field_data.sprite_index)
+            image = RESA_SSH.scaled_image(field_data.sprite_sheet, field_data.sprite_index, field_size)
             field = Field(field_data.pos, image)
             field.sprite_sheet_id = field_data.sprite_sheet
             field.sprite_id = field_data.sprite_index
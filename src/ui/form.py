@@ -6,8 +6,9 @@
 """
 import pygame
 import src
-from src.handler import RESA_SH, RESA_EH
+from src.handler import RESA_SH, RESA_EH, RESA_FH, RESA_BUNDLE
 from src.handler.spritesheet import SpriteSheetHandler
+from src.handler.dirty import DirtyTracker
 
 LEFT = 0
 RIGHT = 1
@@ -26,7 +27,6 @@ COLOR_BTN_HOVER = (120, 117, 98)
 COLOR_BTN_PRESSED = (120, 117, 98)
 ALPHA = 192
 
-STD_SYSFONT = 'Arial'
 STD_FONT_SIZE = 20
 MSG_FONT_SIZE = 16
 
@@ -132,6 +132,9 @@ class Title(Form):
         self.bg_image = bg_image
         self.colorkey = colorkey
         self.form_objects = pygame.sprite.Group()
+        self.tracker = DirtyTracker()
+        self.dirty = True
+        self._blits = []
 
         self.set_bg_image(self.bg_image)
 
@@ -144,7 +147,7 @@ class Title(Form):
         self.bg_image = bg_image
 
         if self.bg_image is not None:
-            pic = pygame.image.load(self.bg_image).convert()
+            pic = RESA_BUNDLE.load_image(self.bg_image)
             self.bg_image = pygame.transform.scale(pic, self.rect.size)
 
     def add(self, form_object: Form | list[Form]) -> None:
@@ -196,10 +199,25 @@ class Title(Form):
         if self.colorkey is not None:
             self.image.set_colorkey(self.colorkey)
 
-        self.form_objects.draw(self.image)
+        # the blit sequence is only collected again if a form object changed
+        if self.tracker.changes(self.form_objects):
+            self.dirty = True
+            self._blits = [(form_object.image, form_object.rect) for form_object in self.form_objects]
+        self.image.blits(self._blits, False)
 
         pygame.Surface.blit(surface, self.image, (self.pos_x, self.pos_y))
 
+    def dirty_rects(self) -> list[pygame.Rect]:
+        """ Returns the area of the title if one of its form objects changed since the last call
+
+        :return: list of changed rects on the rendered surface
+        """
+        if not self.dirty:
+            return []
+
+        self.dirty = False
+        return [pygame.Rect((self.pos_x, self.pos_y), self.rect.size)]
+
 
 class Interface(object):
     """Base class for interfaces. Should not be used directly.
@@ -250,6 +268,12 @@ class Interface(object):
         else:
             raise TypeError('title has to be <object> Title(Form)')
 
+    def dirty_rects(self) -> list[pygame.Rect]:
+        if self.__bool__():
+            return self.title.dirty_rects()
+        else:
+            raise TypeError('title has to be <object> Title(Form)')
+
     def __bool__(self):
         if isinstance(self.title, Title):
             return True
@@ -290,10 +314,7 @@ class Label(Form):
         """
         if size != 0:
             self.font_size = size
-        if font:
-            self.font = pygame.font.Font(font, self.font_size)
-        else:
-            self.font = pygame.font.SysFont(STD_SYSFONT, self.font_size)
+        self.font = RESA_FH.get(font, self.font_size)
 
         self.render_text()
 
@@ -317,14 +338,16 @@ class Label(Form):
         self.render_text()
 
     def update(self) -> None:
-        """ Updates the textbox by checking the callback function
+        """ Updates the textbox by checking the callback function. The text is only rendered again if
+            it changed.
 
         :return: None
         """
         if self.callback is not None:
-            self.text = self.callback()
-            self.render_text()
-            self.align()
+            text = self.callback()
+            if text != self.text:
+                self.text = text
+                self.render_text()
 
 
 class Button(Form):
@@ -425,10 +448,7 @@ class Button(Form):
         """
         if size != 0:
             self.font_size = size
-        if font:
-            self.font = pygame.font.Font(font, self.font_size)
-        else:
-            self.font = pygame.font.SysFont(STD_SYSFONT, self.font_size)
+        self.font = RESA_FH.get(font, self.font_size)
         self.load_sprites()
         self.scale()
         self.render_text()
@@ -443,15 +463,16 @@ class Button(Form):
             self.surf_images[key] = pygame.transform.scale(self.surf_images[key], self.rect.size)
 
     def load_sprites(self) -> None:
-        """ Loads individual sprites from sprite sheet for each button state
+        """ Loads individual sprites from sprite sheet for each button state. Sprites are read-only views
+            and get copied by scale().
 
         :return: None
         """
         self.surf_images = {
-            "standard": self.sprite_sheet_handler.image_by_index(self.sprite_sheet_key, 0),
-            "hover": self.sprite_sheet_handler.image_by_index(self.sprite_sheet_key, 1),
-            "pressed": self.sprite_sheet_handler.image_by_index(self.sprite_sheet_key, 2),
-            "disabled": self.sprite_sheet_handler.image_by_index(self.sprite_sheet_key, 3)
+            "standard": self.sprite_sheet_handler.sprite(self.sprite_sheet_key, 0),
+            "hover": self.sprite_sheet_handler.sprite(self.sprite_sheet_key, 1),
+            "pressed": self.sprite_sheet_handler.sprite(self.sprite_sheet_key, 2),
+            "disabled": self.sprite_sheet_handler.sprite(self.sprite_sheet_key, 3)
         }
 
     def render_text(self) -> None:
@@ -583,17 +604,18 @@ class Switch(Form):
             self.surf_images[key] = pygame.transform.scale(self.surf_images[key], self.rect.size)
 
     def load_sprites(self) -> None:
-        """ Loads individual sprites from sprite sheet for each switch state
+        """ Loads individual sprites from sprite sheet for each switch state. Sprites are read-only views
+            and get copied by scale().
 
         :return: None
         """
         self.surf_images = {
-            "active": self.sprite_sheet_handler.image_by_index(self.sprite_sheet_key, 1),
-            "hover_active": pygame.transform.rotate(self.sprite_sheet_handler.image_by_index(self.sprite_sheet_key, 0),
+            "active": self.sprite_sheet_handler.sprite(self.sprite_sheet_key, 1),
+            "hover_active": pygame.transform.rotate(self.sprite_sheet_handler.sprite(self.sprite_sheet_key, 0),
                                                     180),
-            "hover_inactive": self.sprite_sheet_handler.image_by_index(self.sprite_sheet_key, 2),
-            "inactive": self.sprite_sheet_handler.image_by_index(self.sprite_sheet_key, 0),
-            "disabled": self.sprite_sheet_handler.image_by_index(self.sprite_sheet_key, 3)
+            "hover_inactive": self.sprite_sheet_handler.sprite(self.sprite_sheet_key, 2),
+            "inactive": self.sprite_sheet_handler.sprite(self.sprite_sheet_key, 0),
+            "disabled": self.sprite_sheet_handler.sprite(self.sprite_sheet_key, 3)
         }
 
     def clicked(self) -> None:
@@ -641,7 +663,7 @@ class InfoBox(Form):
         Form.__init__(self, (0, 0))
 
         # render font image
-        self.font = pygame.font.Font(None, MSG_FONT_SIZE)
+        self.font = RESA_FH.get(None, MSG_FONT_SIZE)
         self.font_image = self.font.render(text, True, COLOR_WHITE)
         self.font_rect = self.font_image.get_rect()
 
@@ -839,6 +861,8 @@ class MessageHandler(object):
         self._msg_cb_event = {}
         self._sprite_sheet_handler = sprite_sheet_handler
         self._sprite_sheet_key = sprite_sheet_key
+        self._tracker = DirtyTracker()
+        self._dirty = []
         # padding top for info boxes
         self.top = 0
 
@@ -886,6 +910,13 @@ class MessageHandler(object):
 
         return False
 
+    def is_animating(self) -> bool:
+        """ Checks if info boxes are shown, which move and disappear without any input.
+
+        :return: true if an info box is shown
+        """
+        return bool(self._info_boxes)
+
     def handle_event(self, event: pygame.event.Event) -> None:
         """ Checks for message box events, raises and handles message box button events.
 
@@ -895,10 +926,10 @@ class MessageHandler(object):
         if event.type == src.ui.EVT_TITLE_EVENT:
             if event.code == src.ui.EVT_MSG_BOX_OK:
                 pygame.event.post(self._msg_cb_event['OK'])
-                self._msgBox = None
+                self.__close()
             elif event.code == src.ui.EVT_MSG_BOX_NO:
                 pygame.event.post(self._msg_cb_event['NO'])
-                self._msgBox = None
+                self.__close()
             else:
                 pass
 
@@ -921,7 +952,25 @@ class MessageHandler(object):
         :param surface: surface to render boxes on
         :return:
         """
-        self._info_boxes.draw(surface)
+        surface.blits([(box.image, box.rect) for box in self._info_boxes], False)
+        self._dirty.extend(self._tracker.changes(self._info_boxes))
 
         if self.is_msg():
             self._msgBox.render(surface)
+            self._dirty.extend(self._msgBox.dirty_rects())
+
+    def dirty_rects(self) -> list[pygame.Rect]:
+        """ Returns the areas of all boxes that moved, changed, appeared or disappeared since the last call.
+
+        :return: list of changed rects on the rendered surface
+        """
+        rects, self._dirty = self._dirty, []
+        return rects
+
+    def __close(self) -> None:
+        """ Closes the message box and marks its area dirty.
+
+        :return: None
+        """
+        self._dirty.append(self._msgBox.title.rect.copy())
+        self._msgBox = None
@@ -0,0 +1,145 @@
+""" This module provides the camera of the map
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import pygame
+from src.handler import RESA_CH
+
+
+def zoom_rect(rect: pygame.Rect, zoom: int, base: int) -> pygame.Rect:
+    """ Scales a rect of the base grid zoom to another grid zoom. Edges are rounded down, so rects that
+        touch each other still touch after scaling.
+
+    :param rect: rect in base grid zoom pixels
+    :param zoom: target grid zoom
+    :param base: grid zoom of the rect
+    :return: rect in target grid zoom pixels
+    """
+    if zoom == base:
+        return pygame.Rect(rect)
+    left = rect.left * zoom // base
+    top = rect.top * zoom // base
+    return pygame.Rect(left, top, rect.right * zoom // base - left, rect.bottom * zoom // base - top)
+
+
+class Camera(object):
+    def __init__(self, view_size: tuple[int, int], world_size: tuple[int, int]) -> None:
+        """ Creates a camera that shows a part of the world. World positions never change, the camera
+            offset and zoom are applied when drawing and picking. World coordinates are pixels of the
+            base grid zoom, the camera rect covers the part of the world that fits into the view.
+
+        :param view_size: size of the visible area
+        :param world_size: size of the world
+        """
+        self.view_size = view_size
+        self.world_size = world_size
+        self.base_zoom = RESA_CH.grid_zoom
+        self.zoom = self.base_zoom
+        self.rect = pygame.Rect((0, 0), view_size)
+
+    @property
+    def origin(self) -> tuple[int, int]:
+        """ Top left corner of the view in pixels of the current zoom
+
+        :return: position
+        """
+        return self.rect.x * self.zoom // self.base_zoom, self.rect.y * self.zoom // self.base_zoom
+
+    @property
+    def offset(self) -> tuple[int, int]:
+        origin = self.origin
+        return -origin[0], -origin[1]
+
+    @property
+    def view(self) -> pygame.Rect:
+        """ Visible area in pixels of the current zoom
+
+        :return: rect
+        """
+        return pygame.Rect(self.origin, self.view_size)
+
+    def set_zoom(self, zoom: int, anchor: tuple[int, int] = None) -> bool:
+        """ Changes the zoom and keeps the world position under the anchor in place.
+
+        :param zoom: grid zoom
+        :param anchor: position in view coordinates, center of the view if None
+        :return: True if the zoom changed
+        """
+        if zoom == self.zoom:
+            return False
+        if anchor is None:
+            anchor = (self.view_size[0] // 2, self.view_size[1] // 2)
+
+        world_x, world_y = self.to_world(anchor)
+        self.zoom = zoom
+        # the camera rect covers the whole view, so partly visible pixels are rounded up
+        self.rect.size = (-(-self.view_size[0] * self.base_zoom // zoom),
+                          -(-self.view_size[1] * self.base_zoom // zoom))
+        self.rect.topleft = (world_x - anchor[0] * self.base_zoom // zoom,
+                             world_y - anchor[1] * self.base_zoom // zoom)
+        self.move(0, 0)
+
+        return True
+
+    def move(self, move_x: int, move_y: int) -> tuple[int, int]:
+        """ Moves the camera and keeps it inside the world.
+
+        :param move_x: movement on x-axis in view pixels
+        :param move_y: movement on y-axis in view pixels
+        :return: actual movement in world pixels
+        """
+        old_x, old_y = self.rect.topleft
+        move_x = move_x * self.base_zoom // self.zoom if move_x > 0 else -(-move_x * self.base_zoom // self.zoom)
+        move_y = move_y * self.base_zoom // self.zoom if move_y > 0 else -(-move_y * self.base_zoom // self.zoom)
+        self.rect.x = max(0, min(self.rect.x + move_x, self.world_size[0] - self.rect.width))
+        self.rect.y = max(0, min(self.rect.y + move_y, self.world_size[1] - self.rect.height))
+
+        return self.rect.x - old_x, self.rect.y - old_y
+
+    def scaled(self, rect: pygame.Rect) -> pygame.Rect:
+        """ Returns a world rect in pixels of the current zoom.
+
+        :param rect: rect in world coordinates
+        :return: rect in zoomed world coordinates
+        """
+        return zoom_rect(rect, self.zoom, self.base_zoom)
+
+    def apply(self, rect: pygame.Rect) -> pygame.Rect:
+        """ Returns a world rect in view coordinates.
+
+        :param rect: rect in world coordinates
+        :return: rect in view coordinates
+        """
+        if self.zoom == self.base_zoom:
+            return rect.move(-self.rect.x, -self.rect.y)
+        return self.scaled(rect).move(self.offset)
+
+    def to_world(self, position: tuple[int, int]) -> tuple[int, int]:
+        """ Converts a view position into world coordinates.
+
+        :param position: position in view coordinates
+        :return: position in world coordinates
+        """
+        origin = self.origin
+        return (position[0] + origin[0]) * self.base_zoom // self.zoom, \
+            (position[1] + origin[1]) * self.base_zoom // self.zoom
+
+    def to_view(self, position: tuple[int, int]) -> tuple[int, int]:
+        """ Converts a world position into view coordinates.
+
+        :param position: position in world coordinates
+        :return: position in view coordinates
+        """
+        origin = self.origin
+        return position[0] * self.zoom // self.base_zoom - origin[0], \
+            position[1] * self.zoom // self.base_zoom - origin[1]
+
+    def visible(self, rect: pygame.Rect) -> bool:
+        """ Checks if a world rect is at least partly visible.
+
+        :param rect: rect in world coordinates
+        :return: True if visible
+        """
+        return self.rect.colliderect(rect)
@@ -1,17 +1,19 @@
 import pygame
-from src.handler import RESA_CH, RESA_EH, RESA_SSH
+from src.handler import RESA_CH, RESA_FSH
 
 
 class Building(pygame.sprite.Sprite):
-    def __init__(self, position: tuple[int, int], image: pygame.image, size: int) -> None:
+    def __init__(self, position: tuple[int, int], size: int, sprite_id: int = 0) -> None:
         pygame.sprite.Sprite.__init__(self)
 
         # image and sprite settings
-        self.image = image
-        self.size = RESA_SSH.aspect_ratio(self.image.get_rect().size, RESA_CH.grid_zoom * 2 * size)
-        self.image = pygame.transform.scale(self.image, self.size).convert_alpha()
-        self.sprite_sheet_id = None
-        self.sprite_id = None
+        self.sprite_sheet_id = 'Buildings'
+        self.sprite_id = sprite_id
+        self.frames = RESA_FSH.get(self.sprite_sheet_id, (self.sprite_id,), 2 * size, RESA_CH.grid_zoom)
+        self.image = self.frames[0]
+        self.size = self.frames.size
+
+        self.static = True
 
         # positions
         self.position = position
@@ -19,10 +21,4 @@ class Building(pygame.sprite.Sprite):
         self.rect.midbottom = self.position
 
     def update(self, event: pygame.event.Event = None) -> None:
-        if event is not None:
-            if event.type == RESA_EH.RESA_GAME_EVENT:
-                if event.code == RESA_EH.RESA_CTRL_MAP_MOVE:
-                    pos_x = self.position[0] + event.move[0]
-                    pox_y = self.position[1] + event.move[1]
-                    self.position = (pos_x, pox_y)
         self.rect.midbottom = self.position
@@ -1,24 +1,26 @@
 import pygame
-from src.handler import RESA_CH, RESA_EH, RESA_SSH
+from src.handler import RESA_CH, RESA_FSH
 
 
 class Mountain(pygame.sprite.Sprite):
-    def __init__(self, position: tuple[int, int], image: pygame.image) -> None:
+    def __init__(self, position: tuple[int, int], sprite_id: int) -> None:
         pygame.sprite.Sprite.__init__(self)
 
         # image and sprite settings
-        self.image = image
-        self.size = RESA_SSH.aspect_ratio(self.image.get_rect().size, RESA_CH.grid_zoom * 2 * 5)
-        self.image = pygame.transform.scale(self.image, self.size).convert_alpha()
-        self.mask = pygame.mask.from_surface(self.image)
-        self.sprite_sheet_id = None
-        self.sprite_id = None
+        self.sprite_sheet_id = 'Mountain'
+        self.sprite_id = sprite_id
+        self.frames = RESA_FSH.get(self.sprite_sheet_id, (self.sprite_id,), 2 * 5, RESA_CH.grid_zoom)
+        self.image = self.frames[0]
+        self.size = self.frames.size
+        self.mask = self.frames.mask(0)
         self.ores = ores = {
             'Gold': False,
             'Iron': False,
             'Gems': False
         }
 
+        self.static = True
+
         # positions
         self.position = position
         self.rect = self.image.get_rect()
@@ -26,14 +28,6 @@ class Mountain(pygame.sprite.Sprite):
 
     def update(self, event: pygame.event.Event = None) -> None | bool:
         if event is not None:
-            if event.type == RESA_EH.RESA_GAME_EVENT:
-                if event.code == RESA_EH.RESA_CTRL_MAP_MOVE:
-                    pos_x = self.position[0] + event.move[0]
-                    pox_y = self.position[1] + event.move[1]
-                    self.position = (pos_x, pox_y)
-
-                    self.rect.midbottom = self.position
-
             if event.type == pygame.MOUSEBUTTONUP:
                 if event.button == 1:
                     pos_in_mask = event.pos[0] - self.rect.x, event.pos[1] - self.rect.y
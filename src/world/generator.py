@@ -8,7 +8,7 @@ import pickle
 import src.locales as locales
 import random
 import pygame
-from src.handler import RESA_CH, RESA_SSH, RESA_EH, RESA_GSH
+from src.handler import RESA_CH, RESA_AH, RESA_GSH, RESA_DH
 from src.ui.screens import GameLoadScreen
 from src.world.objects.field import RawField, Field
 from src.world.entities.tree import Tree
@@ -17,55 +17,256 @@ from src.world.entities.rock import Rock
 from src.world.entities.mountain import Mountain
 import src.world.objects.island as islands
 import src.world.grid
+from src.world.spatial import SpatialIndex
+from src.world.terrain import Terrain
+from src.world.renderqueue import RenderQueue
+import src.handler.dirty as dirty
 
 
 class World(object):
     def __init__(self, grid_x, grid_y):
         self.grid = src.world.grid.Grid(grid_x, grid_y, RESA_CH.grid_zoom)
         self.rect = pygame.Rect((0, 0), (self.grid.grid_width, self.grid.grid_height))
-        self.image = pygame.Surface(self.rect.size)
-        self.grid_image = pygame.Surface(self.rect.size)
+        self.terrain = Terrain(self.grid, RESA_CH.terrain_chunk_size, RESA_CH.terrain_chunks)
         self.grid_fields = {}
         self.fields = pygame.sprite.Group()
         self.islands = None
-        self.mouse_shift_x = 0
-        self.mouse_shift_y = 0
+        # all entities in depth order and by area, only animated or changing ones are drawn every frame
+        self.queue = RenderQueue()
+        self.index = SpatialIndex()
+        self.dynamic = RenderQueue()
+        # entities that need updates, animated ones look up their frame from the animation clock
+        self.active = RenderQueue()
+        self.changed = []
+        self.drawn = 0
+        # sprites away from the view are updated in turns
+        self._turns = []
+        self._turns_key = None
+        self._turn = 0
+        # blit sequence of the last frame, valid until the camera moves or an index changes
+        self._blit_key = None
+        self._visible = []
+        self._images = []
+        self._rects = []
+        self._dests = []
+        self._areas = []
+        # composition of each dynamic sprite in pixels of the zoom, valid until the zoom or an index changes
+        self._plans = {}
+        self._plans_key = None
+
+    def add_field(self, field: Field) -> None:
+        """ Adds a field on top of the terrain.
+
+        :param field: field sprite
+        :return: None
+        """
+        self.fields.add(field)
+        self.terrain.add(field)
+
+    def clear_fields(self) -> None:
+        """ Removes all fields from the world and its terrain.
+
+        :return: None
+        """
+        self.fields.empty()
+        self.terrain.clear()
+
+    @property
+    def total(self) -> int:
+        return len(self.index)
 
-    def create_images(self):
-        self.fields.draw(self.image)
-        self.fields.draw(self.grid_image)
-        self.grid.draw_iso_grid(self.grid_image, (0, 0))
+    def set_sprite(self, key: int, sprite: pygame.sprite.Sprite | None) -> None:
+        """ Sets the sprite of a field and keeps the spatial indices and static layer up-to-date.
+
+        :param key: iso key of the field
+        :param sprite: new sprite or None to remove the current one
+        :return: None
+        """
+        raw_field = self.grid_fields[key]
+        if raw_field.sprite is not None:
+            self.queue.remove(raw_field.sprite)
+            self.index.remove(raw_field.sprite)
+            self.dynamic.remove(raw_field.sprite)
+            self.active.remove(raw_field.sprite)
+            self.terrain.remove_static(raw_field.sprite)
+        raw_field.sprite = sprite
+        if sprite is not None:
+            self.__place(sprite)
+
+    def __place(self, sprite: pygame.sprite.Sprite) -> None:
+        """ Queues a sprite by its isometric depth and puts it into the static layer of the terrain or
+            the dynamic pass. Sprites with a true static attribute never change their appearance, so the
+            terrain draws them into its chunks.
+
+        :param sprite: sprite
+        :return: None
+        """
+        order = self.queue.insert(sprite, sprite.rect)
+        self.index.insert(sprite, sprite.rect, order)
+        if getattr(sprite, 'static', False):
+            self.dynamic.remove(sprite)
+            self.terrain.add_static(sprite, order)
+        else:
+            self.terrain.remove_static(sprite)
+            self.dynamic.insert(sprite, sprite.rect, order)
+        if getattr(sprite, 'animated', False):
+            self.active.remove(sprite)
+        else:
+            self.active.insert(sprite, sprite.rect, order)
 
     def handle_event(self, event):
-        # iterate reversed cause of isometric overlap
-        for key, value in reversed(self.grid_fields.items()):
-            if event.type == RESA_EH.RESA_GAME_EVENT:
-                if event.code == RESA_EH.RESA_CTRL_MAP_MOVE:
-                    value.rect.x += event.move[0]
-                    value.rect.y += event.move[1]
-
-                    if value.sprite is not None:
-                        value.sprite.update(event)
-            elif event.type == pygame.MOUSEBUTTONUP:
-                if event.button == 1:
-                    pos_x, pos_y = event.pos
-                    if value.sprite is not None:
-                        if value.sprite.update(pygame.event.Event(
-                            pygame.MOUSEBUTTONUP,
-                            button=1,
-                            pos=(pos_x - self.mouse_shift_x, pos_y - self.mouse_shift_y)
-                        )) is not None:
-                            return
-
-    def update(self):
-        for key, value in self.grid_fields.items():
-            if value.sprite is not None:
-                value.sprite.update()
-
-    def draw(self, surface):
-        for key, value in self.grid_fields.items():
-            if value.sprite is not None:
-                surface.blit(value.sprite.image, value.sprite.rect)
+        """ Passes mouse clicks in world coordinates to the sprites under the cursor
+
+        :param event: event with a position in world coordinates
+        :return: None
+        """
+        if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            # the front-most sprite gets the click first
+            for sprite in self.queue.pick(event.pos):
+                if sprite.update(event) is not None:
+                    return
+
+    def update(self, area: pygame.Rect = None, budget: int = 0) -> None:
+        """ Updates the sprites of the world except purely animated ones. With a budget, only the sprites in
+            the area are updated every frame and the others take turns, budget sprites per frame.
+
+        :param area: area in world coordinates whose sprites are updated every frame
+        :param budget: number of other sprites updated per frame, all sprites every frame if 0
+        :return: None
+        """
+        if area is None or budget <= 0:
+            for sprite in list(self.active.keys):
+                self.__update(sprite)
+            return
+
+        near = self.active.query(area)
+        for sprite in near:
+            self.__update(sprite)
+
+        if self._turns_key != self.active.version:
+            self._turns_key = self.active.version
+            self._turns = list(self.active.keys)
+        if not self._turns:
+            return
+        near = set(near)
+        start = self._turn % len(self._turns)
+        self._turn = start + budget
+        for sprite in self._turns[start:self._turn] + self._turns[:max(0, self._turn - len(self._turns))]:
+            if sprite not in near:
+                self.__update(sprite)
+
+    def __update(self, sprite: pygame.sprite.Sprite) -> None:
+        """ Updates a sprite and places it again if it changed its bounds or settled.
+
+        :param sprite: sprite
+        :return: None
+        """
+        sprite.update()
+        # grown or moved sprites get new bounds, settled ones move into the static layer
+        if self.index.moved(sprite, sprite.rect) or \
+                (sprite in self.dynamic.keys and getattr(sprite, 'static', False)):
+            self.__place(sprite)
+
+    def draw(self, surface, camera):
+        """ Draws the dynamic sprites in the camera view in isometric depth order and collects the areas
+            of changed sprites in changed.
+
+        :param surface: surface of the camera view
+        :param camera: camera
+        :return: None
+        """
+        key = (tuple(camera.rect), camera.zoom, self.index.version, self.terrain.statics.version,
+               self.terrain.version)
+        if key != self._blit_key:
+            scrolled = self._blit_key is None or key[:2] != self._blit_key[:2]
+            if not scrolled:
+                old = self.__states()
+            self._blit_key = key
+            self.__sequence(camera)
+            self.changed = [] if scrolled else dirty.diff(old, self.__states())
+            RESA_DH.blit_audit.check_all(self._images, surface, 'World.draw')
+        else:
+            images = [source.image for source in self._visible]
+            self.changed = [rect for rect, old, new in zip(self._rects, self._images, images) if old is not new]
+            self._images = images
+
+        frames = self._images
+        if camera.zoom != camera.base_zoom:
+            zoomed = RESA_AH.zoomed(camera.zoom)
+            frames = [zoomed.get(image, image) for image in frames]
+        surface.blits(zip(frames, self._dests, self._areas), False)
+
+    def __sequence(self, camera) -> None:
+        """ Collects the blit sequence of the dynamic sprites in the camera view from their plans.
+
+        :param camera: camera
+        :return: None
+        """
+        plans_key = (camera.zoom, self.index.version, self.terrain.statics.version)
+        if plans_key != self._plans_key:
+            self._plans_key = plans_key
+            self._plans.clear()
+
+        visible = self.dynamic.query(camera.rect)
+        plans = self._plans
+        entries = [entry for sprite in visible for entry in (plans.get(sprite) or self.__plan(sprite, camera))]
+        if len(entries) > len(visible):
+            # ground of chunks out of view is not rasterized and not needed
+            ground = self.terrain.ground_patch
+            sequence = []
+            for source, rect, area in entries:
+                if source.__class__ is tuple:
+                    source = ground(source, area)
+                    if source is None:
+                        continue
+                    area = source.area
+                sequence.append((source, rect, area))
+            entries = sequence
+
+        offset = camera.offset
+        self._visible = [source for source, rect, area in entries]
+        self._rects = [rect for source, rect, area in entries]
+        self._dests = [rect.move(offset) for rect in self._rects]
+        self._areas = [area for source, rect, area in entries]
+        self._images = [source.image for source in self._visible]
+        self.drawn = len(visible)
+
+    def __states(self) -> dict:
+        """ Returns image and rect of the dynamic sprites in the blit sequence.
+
+        :return: states by sprite
+        """
+        return {source: (image, tuple(rect))
+                for source, image, rect, area in zip(self._visible, self._images, self._rects, self._areas)
+                if area is None}
+
+    def __plan(self, sprite: pygame.sprite.Sprite, camera) -> list[tuple]:
+        """ Plans and keeps the blits of a dynamic sprite. Where static entities are in front of it, the
+            area is composed again from the ground up, so their semi-transparent pixels are blended only once.
+
+        :param sprite: dynamic sprite
+        :param camera: camera with the zoom of the plan
+        :return: sprite or chunk cell, rect in pixels of the zoom and area of the source for each blit
+        """
+        plan = self._plans[sprite] = [(sprite, camera.scaled(sprite.rect), None)]
+        statics = self.terrain.statics
+        order = self.dynamic.key(sprite)
+        fronts = [static.rect for static in statics.query(sprite.rect) if statics.order[static] > order]
+        if not fronts:
+            return plan
+
+        area = fronts[0].unionall(fronts[1:]).clip(sprite.rect)
+        zoomed = camera.scaled(area)
+        plan.extend(self.terrain.ground(zoomed))
+        for other in self.index.query(area):
+            # later dynamic sprites are drawn by their own plan
+            if self.dynamic.keys.get(other, order) > order:
+                continue
+            rect = camera.scaled(other.rect)
+            clip = rect.clip(zoomed)
+            plan.append((other, clip, clip.move(-rect.x, -rect.y)))
+
+        return plan
 
 
 class Generator(object):
@@ -112,8 +313,6 @@ class Generator(object):
         self.load_msg = f"{locales.get('load_world_islands')}"
         self.__update_load_screen()
         self.__create_islands()
-        # background
-        self.world.create_images()
         # plant trees
         self.load_msg = f"{locales.get('load_world_trees')}"
         self.__update_load_screen()
@@ -140,12 +339,14 @@ class Generator(object):
 
     def fill(self) -> None:
         # fresh start with solid water tiles
-        self.world.fields.empty()
+        self.world.clear_fields()
         sprite_sheet = 'Tiles'
         sprite_index = 2
 
+        atlas = RESA_AH.get(RESA_CH.grid_zoom)
+
         for key, value in self.world.grid.fields_iso.items():
-            image = RESA_SSH.image_by_index(sprite_sheet, sprite_index)
+            image = atlas.image_by_index(sprite_sheet, sprite_index, 2)
             new_field = Field((value.rect.x, value.rect.y), image)
             new_field.sprite_sheet_id = sprite_sheet
             new_field.sprite_id = sprite_index
@@ -160,10 +361,11 @@ class Generator(object):
             self.world.grid_fields[key] = raw_field
 
             # add to sprite group and go on
-            self.world.fields.add(new_field)
+            self.world.add_field(new_field)
 
     def __create_islands(self):
         field_shift = 44
+        atlas = RESA_AH.get(RESA_CH.grid_zoom)
 
         for key, value in self.world.islands.items():
             if key == 'North_West':
@@ -203,7 +405,7 @@ class Generator(object):
                 if row_even:
                     if col_count <= self.world.grid.fields_x // 6:
                         if field_data.sprite_index != 2:
-                            image = RESA_SSH.image_by_index(field_data.sprite_sheet, field_data.sprite_index)
+                            image = atlas.image_by_index(field_data.sprite_sheet, field_data.sprite_index, 2)
                             field = Field(self.world.grid.fields_iso[nc_key].rect.topleft, image)
                             field.sprite_sheet_id = field_data.sprite_sheet
                             field.sprite_id = field_data.sprite_index
@@ -228,7 +430,7 @@ class Generator(object):
                                 raw_field.buildable = True
                                 field.buildable = True
 
-                            self.world.fields.add(field)
+                            self.world.add_field(field)
                             self.world.grid_fields[nc_key] = raw_field
 
                         col_count += 1
@@ -245,7 +447,7 @@ class Generator(object):
                 if not row_even:
                     if col_count <= self.world.grid.fields_x // 6 - 1:
                         if field_data.sprite_index != 2:
-                            image = RESA_SSH.image_by_index(field_data.sprite_sheet, field_data.sprite_index)
+                            image = atlas.image_by_index(field_data.sprite_sheet, field_data.sprite_index, 2)
                             field = Field(self.world.grid.fields_iso[nc_key].rect.topleft, image)
                             field.sprite_sheet_id = field_data.sprite_sheet
                             field.sprite_id = field_data.sprite_index
@@ -270,7 +472,7 @@ class Generator(object):
                                 raw_field.buildable = True
                                 field.buildable = True
 
-                            self.world.fields.add(field)
+                            self.world.add_field(field)
                             self.world.grid_fields[nc_key] = raw_field
 
                         col_count += 1
@@ -285,7 +487,7 @@ class Generator(object):
                             break
 
                         if field_data.sprite_index != 2:
-                            image = RESA_SSH.image_by_index(field_data.sprite_sheet, field_data.sprite_index)
+                            image = atlas.image_by_index(field_data.sprite_sheet, field_data.sprite_index, 2)
                             field = Field(self.world.grid.fields_iso[nc_key].rect.topleft, image)
                             field.sprite_sheet_id = field_data.sprite_sheet
                             field.sprite_id = field_data.sprite_index
@@ -310,7 +512,7 @@ class Generator(object):
                                 raw_field.buildable = True
                                 field.buildable = True
 
-                            self.world.fields.add(field)
+                            self.world.add_field(field)
                             self.world.grid_fields[nc_key] = raw_field
                 nc_key += 1
 
@@ -342,7 +544,7 @@ class Generator(object):
                     pos = field.rect.bottomleft
                     tree = Tree(pos, tree_type)
 
-                    self.world.grid_fields[field.iso_key].sprite = tree
+                    self.world.set_sprite(field.iso_key, tree)
 
     def __spread_fishes(self):
         for key, value in self.world.grid_fields.items():
@@ -358,17 +560,15 @@ class Generator(object):
                 if check and random.randrange(0, 100, 1) <= RESA_CH.fish_spawn:
                     pos = value.rect.bottomleft
                     fishes = Fishes(pos)
-                    self.world.grid_fields[key].sprite = fishes
+                    self.world.set_sprite(key, fishes)
 
     def __throw_rocks(self):
-        sprite_sheet = 'Rocks'
         for key, value in self.world.grid_fields.items():
             if value.buildable and value.sprite is None:
                 if random.randrange(0, 100, 1) <= RESA_CH.rock_spawn:
                     sprite_index = random.choice([0, 1, 2])
                     pos = value.rect.bottomleft
-                    image = RESA_SSH.image_by_index(sprite_sheet, sprite_index)
-                    self.world.grid_fields[key].sprite = Rock(pos, image)
+                    self.world.set_sprite(key, Rock(pos, sprite_index))
 
     def __check_mountain_place(self, key):
         # check inner 3x3
@@ -425,7 +625,6 @@ class Generator(object):
         return True
 
     def __raise_mountains(self):
-        sprite_sheet = 'Mountain'
         sprite_index = 0
 
         for key, value in self.world.grid_fields.items():
@@ -437,34 +636,33 @@ class Generator(object):
                     neighbors_right = self.world.grid.iso_grid_neighbors(neighbors.right)
                     neighbors_left = self.world.grid.iso_grid_neighbors(neighbors.left)
 
-                    self.world.grid_fields[key].sprite = None
+                    self.world.set_sprite(key, None)
                     self.world.grid_fields[key].buildable = False
                     for rawval in neighbors.all:
-                        self.world.grid_fields[rawval].sprite = None
+                        self.world.set_sprite(rawval, None)
                         self.world.grid_fields[rawval].buildable = False
                     for rawval in neighbors_top.all:
-                        self.world.grid_fields[rawval].sprite = None
+                        self.world.set_sprite(rawval, None)
                         self.world.grid_fields[rawval].buildable = False
                     for rawval in neighbors_bottom.all:
-                        self.world.grid_fields[rawval].sprite = None
+                        self.world.set_sprite(rawval, None)
                         self.world.grid_fields[rawval].buildable = False
                     for rawval in neighbors_right.all:
-                        self.world.grid_fields[rawval].sprite = None
+                        self.world.set_sprite(rawval, None)
                         self.world.grid_fields[rawval].buildable = False
                     for rawval in neighbors_left.all:
-                        self.world.grid_fields[rawval].sprite = None
+                        self.world.set_sprite(rawval, None)
                         self.world.grid_fields[rawval].buildable = False
 
                     pos = self.world.grid_fields[neighbors_bottom.bottom].rect.midbottom
-                    image = RESA_SSH.image_by_index(sprite_sheet, sprite_index)
-                    mountain = Mountain(pos, image)
+                    mountain = Mountain(pos, sprite_index)
 
                     # ore generation
                     for ore_key, ore_value in mountain.ores.items():
                         if random.randrange(0, 100, 1) <= RESA_CH.mountain_ore_spawn[value.island][ore_key]:
                             mountain.ores[ore_key] = True
 
-                    self.world.grid_fields[key].sprite = mountain
+                    self.world.set_sprite(key, mountain)
                     self.world.islands[value.island].mountains.append(mountain)
 
         RESA_GSH.reset_mountain_spawn_attempts()
@@ -5,6 +5,7 @@
 :license: CC-BY-SA-4.0
 """
 import pygame
+import src.handler.pixelformat as pixelformat
 
 
 class GridField(object):
@@ -423,3 +424,71 @@ class Grid(object):
             neighbors.bottomright = -1
 
         return neighbors
+
+
+class GridOverlay(object):
+    def __init__(self, color: tuple[int, int, int] = (0, 255, 0)) -> None:
+        """ Draws the isometric grid over a camera view. A single transparent field of each grid zoom is
+            created on first use and repeated once over the size of the view, so the overlay costs one
+            colorkey blit per frame and no world-sized surface.
+
+        :param color: color of the grid
+        """
+        self.color = color
+        self.tiles = {}
+        self.pattern = None
+        self._pattern_key = None
+
+    def tile(self, zoom: int) -> pygame.Surface:
+        """ Returns the transparent field of a grid zoom and creates it on first use.
+
+        :param zoom: grid zoom
+        :return: tile of the size of an isometric field
+        """
+        tile = self.tiles.get(zoom)
+        if tile is None:
+            field = Grid(2, 1, zoom)
+            tile = pixelformat.surface((field.iso_width, field.iso_height))
+            tile.fill((0, 0, 0))
+            field.draw_iso_grid(tile, color=self.color)
+            tile.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+            self.tiles[zoom] = tile
+
+        return tile
+
+    def release(self, zoom: int) -> None:
+        """ Drops the tile and pattern of a grid zoom.
+
+        :param zoom: grid zoom
+        :return: None
+        """
+        self.tiles.pop(zoom, None)
+        if self._pattern_key is not None and self._pattern_key[0] == zoom:
+            self.pattern = self._pattern_key = None
+
+    def draw(self, surface: pygame.Surface, camera) -> None:
+        """ Draws the grid over the part of the world inside the camera view.
+
+        :param surface: surface of the camera view
+        :param camera: camera
+        :return: None
+        """
+        tile = self.tile(camera.zoom)
+        width, height = tile.get_size()
+        view_width, view_height = surface.get_size()
+        key = (camera.zoom, view_width, view_height)
+        if self._pattern_key != key:
+            self.pattern = pixelformat.surface((view_width + width, view_height + height))
+            self.pattern.fill((0, 0, 0))
+            self.pattern.blits([(tile, (x, y)) for x in range(0, view_width + width, width)
+                                for y in range(0, view_height + height, height)], False)
+            self.pattern.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+            self._pattern_key = key
+
+        origin_x, origin_y = camera.origin
+        world = camera.scaled(pygame.Rect((0, 0), camera.world_size)).move(camera.offset)
+        area = world.clip(surface.get_rect())
+        if area:
+            # the pattern starts at a field corner left of and above the view
+            shift_x, shift_y = origin_x % width, origin_y % height
+            surface.blit(self.pattern, area, area.move(shift_x, shift_y))
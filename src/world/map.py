@@ -4,10 +4,19 @@
 :source: https://github.com/Kanasaru/resa
 :license: CC-BY-SA-4.0
 """
+import logging
+import math
+import time
+from collections import OrderedDict
 import pygame.sprite
 from src.world.generator import Generator
 from src.world.objects.field import Field
-from src.handler import RESA_CH, RESA_SSH, RESA_GSH, RESA_EH
+from src.world.camera import Camera
+from src.world.grid import GridOverlay
+from src.ui.backend import SurfaceBackend
+from src.handler.dirty import DirtyTracker
+from src.handler import RESA_CH, RESA_AH, RESA_GSH, RESA_DH, RESA_AC
+import src.handler.pixelformat as pixelformat
 
 
 class Moving(object):
@@ -30,27 +39,53 @@ class Moving(object):
 
 
 class Map(object):
-    def __init__(self, screen_size: tuple[int, int], map_shift: tuple[int, int]) -> None:
+    def __init__(self, screen_size: tuple[int, int], map_shift: tuple[int, int], render_scale: float = 1.0,
+                 backend=None) -> None:
         """ Initializes a world loading instance
 
         :param screen_size: tuple of screen size
+        :param map_shift: position of the map on screen
+        :param render_scale: resolution of the rendered map relative to its screen size
+        :param backend: render backend that creates the map surface, software blits if None
         """
         # event handling varibales
         self.moving = Moving()
         self.map_shift = map_shift
 
         self.buildsprites = pygame.sprite.Group()
+        self.build_tracker = DirtyTracker()
 
-        # surfaces
+        # surfaces, the map is rendered at render size and scaled up to the screen size
+        self.backend = SurfaceBackend() if backend is None else backend
         self.screen_size = screen_size
-        self.surface = pygame.Surface(self.screen_size)
+        self.render_scale = None
+        self.render_size = screen_size
+        self.surface = None
+        self.output = None
 
         # world src
         self.rect = pygame.Rect((0, 0), (0, 0))
+        self.camera = Camera(self.screen_size, self.rect.size)
 
         self.world = None
-        self.grid_image = None
         self.show_grid = False
+        self.grid = GridOverlay()
+        # quality settings, the grid can be disabled and sprites away from the view are updated in turns
+        self.grid_overlay = True
+        self.update_margin = 256
+        self.update_budget = 0
+        # render scales the quality governor can pick, their zooms are prepared ahead of time
+        self.quality_scales = ()
+        # zoom level of the map and zooms besides the base zoom with cached terrain and frames, least
+        # recently used first
+        self.zoom_level = RESA_CH.grid_zoom
+        self.zooms = OrderedDict()
+
+        # changed areas on screen, the whole map is redrawn after scrolling
+        self.redraw = True
+        self._dirty = []
+
+        self.set_render_scale(render_scale)
 
     def build_world(self, world_data: tuple[pygame.Rect, dict, dict] = None) -> None:
         """ Builds the world from scratch or given world src
@@ -74,9 +109,191 @@ class Map(object):
         # get all sprites from world
         self.world = world.get_world()
         self.rect = self.world.rect
-        # mouse shift for events
-        self.world.mouse_shift_x = self.rect.x + self.map_shift[0]
-        self.world.mouse_shift_y = self.rect.y + self.map_shift[1]
+        self.camera = Camera(self.render_size, self.rect.size)
+        self.camera.set_zoom(self.render_zoom)
+        self.world.terrain.max_chunks = RESA_CH.terrain_chunks or self.__chunk_budget()
+        self.redraw = True
+
+    @property
+    def render_zoom(self) -> int:
+        """ Grid zoom the map is rendered with, the zoom level at render scale
+
+        :return: grid zoom
+        """
+        return self.__zoom_at(self.render_scale)
+
+    @property
+    def quality_zooms(self) -> set[int]:
+        """ Grid zooms the quality governor can switch to at the current zoom level
+
+        :return: grid zooms
+        """
+        if RESA_CH.render_scale_ui:
+            return set()
+        return {self.__zoom_at(min(RESA_CH.render_scale, scale)) for scale in self.quality_scales}
+
+    def __zoom_at(self, render_scale: float) -> int:
+        """ Returns the grid zoom the current zoom level is rendered with at a render scale.
+
+        :param render_scale: render scale
+        :return: grid zoom
+        """
+        return max(1, round(self.zoom_level * max(.1, min(render_scale, 1.0))))
+
+    def set_render_scale(self, render_scale: float) -> None:
+        """ Sets the resolution the map is rendered at. Scales below 1 render the same part of the world
+            with fewer pixels at a smaller grid zoom and scale the map up to its screen size once per frame.
+
+        :param render_scale: resolution of the rendered map relative to its screen size
+        :return: None
+        """
+        render_scale = max(.1, min(render_scale, 1.0))
+        if render_scale == self.render_scale:
+            return
+
+        self.render_scale = render_scale
+        self.render_size = (max(1, round(self.screen_size[0] * render_scale)),
+                            max(1, round(self.screen_size[1] * render_scale)))
+        self.surface = self.backend.canvas(self.render_size)
+        # backends that scale while presenting get the map in render size
+        scaled = self.render_size != self.screen_size and not self.backend.scales
+        self.output = pixelformat.surface(self.screen_size) if scaled else None
+
+        # keep the center of the view in place
+        center = self.camera.rect.center
+        camera = Camera(self.render_size, self.rect.size)
+        camera.set_zoom(self.render_zoom)
+        camera.rect.center = center
+        camera.move(0, 0)
+        self.camera = camera
+        self.__cache_zoom()
+        self.redraw = True
+
+    def apply_quality(self, settings: dict) -> None:
+        """ Applies the settings of a quality level.
+
+        :param settings: render_scale, grid, fish_frame_time, update_margin and update_budget of the level
+        :return: None
+        """
+        if not RESA_CH.render_scale_ui:
+            self.set_render_scale(min(RESA_CH.render_scale, settings['render_scale']))
+        if self.grid_overlay != settings['grid']:
+            self.grid_overlay = settings['grid']
+            self.redraw = True
+        RESA_AC.set_frame_time('Fishes', settings['fish_frame_time'])
+        self.update_margin = settings['update_margin']
+        self.update_budget = settings['update_budget']
+
+    def set_quality_scales(self, scales) -> None:
+        """ Sets the render scales the quality governor can pick. Their atlases are built in the background
+            and kept, and their terrain is rasterized in spare frame time, see warm, so quality steps do not
+            stall a frame.
+
+        :param scales: render scales
+        :return: None
+        """
+        self.quality_scales = tuple(scales)
+        self.__cache_zoom()
+
+    def warm(self, limit: float) -> None:
+        """ Rasterizes the terrain of the view at the zooms of the other quality levels ahead of time.
+
+        :param limit: maximal time in milliseconds
+        :return: None
+        """
+        if limit <= 0 or self.world is None:
+            return
+        deadline = time.perf_counter() + limit / 1000
+        for zoom in sorted(self.quality_zooms - {self.camera.zoom}, reverse=True):
+            limit = (deadline - time.perf_counter()) * 1000
+            if limit <= 0 or not self.world.terrain.warm(zoom, self.camera.rect, limit):
+                return
+
+    def zoom(self, step: int, anchor: tuple[int, int] = None) -> None:
+        """ Zooms in or out by a number of zoom levels.
+
+        :param step: positive to zoom in, negative to zoom out
+        :param anchor: position on screen that keeps its place, center of the map if None
+        :return: None
+        """
+        levels = RESA_CH.zoom_levels
+        index = levels.index(self.zoom_level) if self.zoom_level in levels else levels.index(RESA_CH.grid_zoom)
+        self.set_zoom(levels[max(0, min(index + step, len(levels) - 1))], anchor)
+
+    def set_zoom(self, zoom: int, anchor: tuple[int, int] = None) -> None:
+        """ Sets the zoom level of the map. The terrain chunks and frames of zooms that were not used
+            recently are dropped.
+
+        :param zoom: grid zoom of the level
+        :param anchor: position on screen that keeps its place, center of the map if None
+        :return: None
+        """
+        self.zoom_level = zoom
+        if anchor is not None:
+            anchor = self.to_view(anchor)
+        if self.camera.set_zoom(self.render_zoom, anchor):
+            self.__cache_zoom()
+            self.redraw = True
+
+    def __cache_zoom(self) -> None:
+        """ Marks the camera zoom as recently used and drops the least recently used zooms. Zooms of the
+            quality levels are kept and their atlases are built in the background.
+
+        :return: None
+        """
+        zoom = self.camera.zoom
+        quality_zooms = self.quality_zooms - {RESA_CH.grid_zoom}
+        missing = sorted(quality_zooms - set(RESA_AH.atlases))
+        for quality_zoom in quality_zooms:
+            self.zooms.setdefault(quality_zoom, True)
+        if zoom != RESA_CH.grid_zoom:
+            self.zooms[zoom] = True
+            self.zooms.move_to_end(zoom)
+        while len([old for old in self.zooms if old not in quality_zooms]) > max(1, RESA_CH.zoom_cache):
+            old = next(old for old in self.zooms if old not in quality_zooms)
+            del self.zooms[old]
+            if self.world is not None:
+                self.world.terrain.release(old)
+            self.grid.release(old)
+            RESA_AH.release(old)
+            logging.debug(f'Dropped zoom level {old}')
+        if self.world is not None:
+            self.world.terrain.max_chunks = RESA_CH.terrain_chunks or self.__chunk_budget()
+        if missing:
+            RESA_AH.prefetch(missing)
+
+    def __chunk_budget(self) -> int:
+        """ Returns the number of terrain chunks that cover the view and a ring of chunks around it at the
+            camera zoom and the view at the zooms of the other quality levels.
+
+        :return: number of chunks
+        """
+        size = RESA_CH.terrain_chunk_size
+        budget = 0
+        for zoom in self.quality_zooms | {self.camera.zoom}:
+            ring = 1 if zoom == self.camera.zoom else 0
+            width, height = (math.ceil(length * zoom / self.zoom_level / size) for length in self.screen_size)
+            # a view that is not aligned to the chunks touches one more of them
+            budget += (width + 1 + 2 * ring) * (height + 1 + 2 * ring)
+
+        return budget
+
+    def to_view(self, position: tuple[int, int]) -> tuple[int, int]:
+        """ Converts a screen position into a position on the rendered map.
+
+        :param position: position on screen
+        :return: position on the map surface
+        """
+        return (position[0] - self.map_shift[0]) * self.render_size[0] // self.screen_size[0], \
+            (position[1] - self.map_shift[1]) * self.render_size[1] // self.screen_size[1]
+
+    def to_world(self, position: tuple[int, int]) -> tuple[int, int]:
+        """ Converts a screen position into world coordinates.
+
+        :param position: position on screen
+        :return: position in world coordinates
+        """
+        return self.camera.to_world(self.to_view(position))
 
     def handle_event(self, event: pygame.event.Event) -> None:
         """ Handles given event
@@ -104,6 +321,11 @@ class Map(object):
                 self.moving.down = False
             if event.key == pygame.K_F5:
                 self.show_grid = not self.show_grid
+                self.redraw = True
+            if event.key == pygame.K_PAGEUP:
+                self.zoom(1)
+            if event.key == pygame.K_PAGEDOWN:
+                self.zoom(-1)
             # >>> BUILDMODE: just for testing
             if event.key == pygame.K_F6:
                 RESA_GSH.building = not RESA_GSH.building
@@ -118,13 +340,18 @@ class Map(object):
                     RESA_GSH.building_size = (3, 3)
             # <<<
         elif event.type == pygame.MOUSEMOTION and RESA_GSH.building:
-            if self.map_shift[0] < event.pos[0] < self.surface.get_width() + self.map_shift[0] and \
-                    self.map_shift[1] < event.pos[1] < self.surface.get_height() + self.map_shift[1]:
+            if self.map_shift[0] < event.pos[0] < self.screen_size[0] + self.map_shift[0] and \
+                    self.map_shift[1] < event.pos[1] < self.screen_size[1] + self.map_shift[1]:
                 self.draw_build_grid(event.pos, RESA_GSH.building_size)
             else:
                 self.buildsprites.empty()
-        else:
-            pass
+        elif event.type == pygame.MOUSEWHEEL:
+            position = pygame.mouse.get_pos()
+            if not pygame.Rect(self.map_shift, self.screen_size).collidepoint(position):
+                position = None
+            self.zoom(1 if event.y > 0 else -1, position)
+        elif event.type == pygame.MOUSEBUTTONUP:
+            event = pygame.event.Event(pygame.MOUSEBUTTONUP, button=event.button, pos=self.to_world(event.pos))
 
         self.world.handle_event(event)
 
@@ -134,49 +361,22 @@ class Map(object):
         :return: None
         """
         if self.moving:
-            # detect amount of movable space in each direction
-            movable_px_right = self.rect.width - self.screen_size[0] - abs(0 - self.rect.x)
-            movable_px_left = abs(0 - self.rect.x)
-            movable_px_up = abs(0 - self.rect.y)
-            movable_px_down = self.rect.height - self.screen_size[1] - abs(0 - self.rect.y)
-
-            # create and fill movement
-            move_field = (0, 0)
-            if self.moving.left and movable_px_left != 0:
-                if movable_px_left < RESA_CH.map_pace:
-                    self.rect.x += movable_px_left
-                    move_field = (movable_px_left, 0)
-                else:
-                    self.rect.x += RESA_CH.map_pace
-                    move_field = (RESA_CH.map_pace, 0)
-            elif self.moving.right and movable_px_right != 0:
-                if movable_px_right < RESA_CH.map_pace:
-                    self.rect.x -= movable_px_right
-                    move_field = (-movable_px_right, 0)
-                else:
-                    self.rect.x -= RESA_CH.map_pace
-                    move_field = (-RESA_CH.map_pace, 0)
-            if self.moving.up and movable_px_up != 0:
-                if movable_px_up < RESA_CH.map_pace:
-                    self.rect.y += movable_px_up
-                    move_field = (move_field[0], movable_px_up)
-                else:
-                    self.rect.y += RESA_CH.map_pace
-                    move_field = (move_field[0], RESA_CH.map_pace)
-            elif self.moving.down and movable_px_down != 0:
-                if movable_px_down < RESA_CH.map_pace:
-                    self.rect.y -= movable_px_down
-                    move_field = (move_field[0], -movable_px_down)
-                else:
-                    self.rect.y -= RESA_CH.map_pace
-                    move_field = (move_field[0], -RESA_CH.map_pace)
-
-            # raise event for movement
-            pygame.event.post(
-                pygame.event.Event(RESA_EH.RESA_GAME_EVENT, code=RESA_EH.RESA_CTRL_MAP_MOVE, move=move_field)
-            )
-            
-        self.world.update()
+            # same pace on screen at every render scale
+            pace = max(1, round(RESA_CH.map_pace * self.render_scale))
+            move_x = move_y = 0
+            if self.moving.left:
+                move_x = -pace
+            elif self.moving.right:
+                move_x = pace
+            if self.moving.up:
+                move_y = -pace
+            elif self.moving.down:
+                move_y = pace
+            if self.camera.move(move_x, move_y) != (0, 0):
+                self.redraw = True
+
+        margin = self.update_margin
+        self.world.update(self.camera.rect.inflate(margin * 2, margin * 2), self.update_budget)
 
     def render(self) -> None:
         """ Renders all fields of the world on its surface
@@ -185,29 +385,77 @@ class Map(object):
         """
         self.surface.fill(RESA_CH.COLOR_BLACK)
 
-        if self.show_grid:
-            self.surface.blit(self.world.grid_image, self.rect.topleft)
-        else:
-            self.surface.blit(self.world.image, self.rect.topleft)
+        self.world.terrain.draw(self.surface, self.camera)
 
         if RESA_GSH.building:
-            self.buildsprites.draw(self.surface)
+            RESA_DH.blit_audit.check_all(self.buildsprites, self.surface, 'Map.render build grid')
+            zoomed = RESA_AH.zoomed(self.camera.zoom) if self.camera.zoom != RESA_CH.grid_zoom else {}
+            self.surface.blits([(zoomed.get(sprite.image, sprite.image), self.camera.apply(sprite.rect))
+                                for sprite in self.buildsprites], False)
+
+        self.world.draw(self.surface, self.camera)
+
+        if self.show_grid and self.grid_overlay:
+            self.grid.draw(self.surface, self.camera)
+
+        # changed areas are in pixels of the zoom
+        changed = self.world.terrain.changed + self.world.changed + \
+            [self.camera.scaled(rect) for rect in
+             self.build_tracker.changes(self.buildsprites if RESA_GSH.building else ())]
+        view = self.surface.get_rect()
+        offset = self.camera.offset
+        for rect in changed:
+            rect = rect.move(offset).clip(view)
+            if rect:
+                self._dirty.append(self.to_screen(rect))
+
+        if self.output is not None:
+            pygame.transform.scale(self.surface, self.screen_size, self.output)
+
+    def to_screen(self, rect: pygame.Rect) -> pygame.Rect:
+        """ Converts a rect on the rendered map into the screen area it is scaled to.
+
+        :param rect: rect on the map surface
+        :return: rect on screen
+        """
+        if self.output is None:
+            return rect.move(self.map_shift)
+
+        width, height = self.screen_size
+        render_width, render_height = self.render_size
+        left = rect.left * width // render_width
+        top = rect.top * height // render_height
+        right = -(-rect.right * width // render_width)
+        bottom = -(-rect.bottom * height // render_height)
+        return pygame.Rect(left + self.map_shift[0], top + self.map_shift[1], right - left, bottom - top)
+
+    def dirty_rects(self) -> list[pygame.Rect] | None:
+        """ Returns the screen areas of the map that changed since the last call.
+
+        :return: list of changed rects on screen or None if the whole map changed
+        """
+        rects, self._dirty = self._dirty, []
+        if self.redraw:
+            self.redraw = False
+            return None
 
-        self.world.draw(self.surface)
+        return rects
 
     def get_surface(self) -> pygame.Surface:
-        """ Returns the current state of the map surface
+        """ Returns the current state of the map surface in screen size
 
         :return: current map surface
         """
+        if self.output is not None:
+            return self.output
         return self.surface
     
     def draw_build_grid(self, position, size):
         x, y = size
         sprite_sheet = 'Tiles'
+        atlas = RESA_AH.get(RESA_CH.grid_zoom)
         # relativate to grid
-        mouse_x = position[0] - self.rect.x - self.map_shift[0]
-        mouse_y = position[1] - self.rect.y - self.map_shift[1]
+        mouse_x, mouse_y = self.to_world(position)
 
         field = self.world.grid.pos_in_iso_grid_field((mouse_x, mouse_y))
         if field:
@@ -220,8 +468,8 @@ class Map(object):
                     sprite_index = 1
                 else:
                     sprite_index = 0
-                image = RESA_SSH.image_by_index(sprite_sheet, sprite_index)
-                new_field = Field((raw_field.rect.x, raw_field.rect.y), image)
+                image = atlas.image_by_index(sprite_sheet, sprite_index, 2)
+                new_field = Field(raw_field.rect.topleft, image)
                 self.buildsprites.add(new_field)
             # 2x2
             elif x == y == 2:
@@ -230,8 +478,8 @@ class Map(object):
                     sprite_index = 1
                 else:
                     sprite_index = 0
-                image = RESA_SSH.image_by_index(sprite_sheet, sprite_index)
-                new_field = Field((raw_field.rect.x, raw_field.rect.y), image)
+                image = atlas.image_by_index(sprite_sheet, sprite_index, 2)
+                new_field = Field(raw_field.rect.topleft, image)
                 self.buildsprites.add(new_field)
                 # set all neighbors false that are not used
                 neighbors.left = -1
@@ -246,8 +494,8 @@ class Map(object):
                             sprite_index = 1
                         else:
                             sprite_index = 0
-                        image = RESA_SSH.image_by_index(sprite_sheet, sprite_index)
-                        new_field = Field((raw_field.rect.x, raw_field.rect.y), image)
+                        image = atlas.image_by_index(sprite_sheet, sprite_index, 2)
+                        new_field = Field(raw_field.rect.topleft, image)
                         self.buildsprites.add(new_field)
             # 3x3
             elif x == y == 3:
@@ -259,8 +507,8 @@ class Map(object):
                         sprite_index = 1
                     else:
                         sprite_index = 0
-                    image = RESA_SSH.image_by_index(sprite_sheet, sprite_index)
-                    new_field = Field((raw_field.rect.x, raw_field.rect.y), image)
+                    image = atlas.image_by_index(sprite_sheet, sprite_index, 2)
+                    new_field = Field(raw_field.rect.topleft, image)
                     self.buildsprites.add(new_field)
                     for rawval in neighbors.all:
                         if rawval:
@@ -269,6 +517,6 @@ class Map(object):
                                 sprite_index = 1
                             else:
                                 sprite_index = 0
-                            image = RESA_SSH.image_by_index(sprite_sheet, sprite_index)
-                            new_field = Field((raw_field.rect.x, raw_field.rect.y), image)
+                            image = atlas.image_by_index(sprite_sheet, sprite_index, 2)
+                            new_field = Field(raw_field.rect.topleft, image)
                             self.buildsprites.add(new_field)
@@ -5,7 +5,8 @@
 :license: CC-BY-SA-4.0
 """
 import pygame
-from src.handler import RESA_CH, RESA_EH
+from src.handler import RESA_CH
+import src.handler.pixelformat as pixelformat
 
 
 class RawField(object):
@@ -41,8 +42,11 @@ class Field(pygame.sprite.Sprite):
         self.solid = False
         self.buildable = False
 
-        # image and sprite settings
-        self.image = pygame.transform.scale(image, self.size).convert_alpha()
+        # image and sprite settings, shared images of the sprite cache already fit
+        if image.get_size() == self.size:
+            self.image = image
+        else:
+            self.image = pixelformat.convert(pygame.transform.scale(image, self.size), pixelformat.ALPHA)
         self.sprite_sheet_id = None
         self.sprite_id = None
 
@@ -59,10 +63,6 @@ class Field(pygame.sprite.Sprite):
         :param event: optional event
         :return: None
         """
-        if event is not None:
-            if event.type == RESA_EH.RESA_GAME_EVENT:
-                if event.code == RESA_EH.RESA_CTRL_MAP_MOVE:
-                    self.position = (self.position[0] + event.move[0], self.position[1] + event.move[1])
         self.rect.topleft = self.position
 
     def delete(self) -> None:
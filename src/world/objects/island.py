@@ -6,7 +6,7 @@
 """
 import pickle
 import random
-from src.handler import RESA_CH
+from src.handler import RESA_CH, RESA_BUNDLE
 
 BIG = 0
 MEDIUM = 1
@@ -77,7 +77,7 @@ class Island(object):
         else:
             temp = 'n'
 
-        self.data_fields = pickle.load(open(f'data/islands/{size}_{temp}_{number}.island', 'rb'))
+        self.data_fields = pickle.loads(RESA_BUNDLE.load_bytes(f'{RESA_CH.islands}/{size}_{temp}_{number}.island'))
 
     def __bool__(self):
         if len(self.data_fields) > 0:
@@ -0,0 +1,141 @@
+""" This module provides a depth-sorted render queue of world entities
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import bisect
+import pygame
+
+
+class RenderQueue(object):
+    def __init__(self) -> None:
+        """ Keeps items in buckets of their isometric depth, the bottom of their bounding rect where they
+            touch the ground. Buckets are kept sorted, so items come out in draw order without sorting.
+            Within a bucket items are ordered from left to right.
+        """
+        self.depths = []
+        self.buckets = {}
+        self.keys = {}
+        self.bounds = {}
+        self.max_height = 0
+        self.version = 0
+        self._serial = 0
+
+    @staticmethod
+    def depth(rect: pygame.Rect) -> int:
+        """ Returns the isometric depth of a bounding rect.
+
+        :param rect: bounding rect
+        :return: depth
+        """
+        return rect.bottom
+
+    def insert(self, item, rect: pygame.Rect, key: tuple = None) -> tuple:
+        """ Adds an item or updates its depth.
+
+        :param item: hashable item
+        :param rect: bounding rect of the item
+        :param key: sort key from another queue to share the order, made from the rect if None
+        :return: sort key of the item
+        """
+        if item in self.keys:
+            self.remove(item)
+
+        if key is None:
+            self._serial += 1
+            key = (self.depth(rect), rect.centerx, self._serial)
+        rect = pygame.Rect(rect)
+
+        bucket = self.buckets.get(key[0])
+        if bucket is None:
+            bucket = self.buckets[key[0]] = []
+            bisect.insort(self.depths, key[0])
+        # keys are unique, so items are never compared
+        bisect.insort(bucket, (key, item))
+
+        self.keys[item] = key
+        self.bounds[item] = rect
+        self.max_height = max(self.max_height, rect.height)
+        self.version += 1
+
+        return key
+
+    def remove(self, item) -> None:
+        """ Removes an item if it is part of the queue.
+
+        :param item: item
+        :return: None
+        """
+        key = self.keys.pop(item, None)
+        if key is None:
+            return
+
+        del self.bounds[item]
+        bucket = self.buckets[key[0]]
+        del bucket[bisect.bisect_left(bucket, (key,))]
+        if not bucket:
+            del self.buckets[key[0]]
+            del self.depths[bisect.bisect_left(self.depths, key[0])]
+        self.version += 1
+
+    def key(self, item) -> tuple:
+        """ Returns the sort key of an item.
+
+        :param item: item
+        :return: sort key, lower keys are drawn first
+        """
+        return self.keys[item]
+
+    def query(self, rect: pygame.Rect) -> list:
+        """ Returns all items whose bounds intersect the rect in draw order.
+
+        :param rect: area to search
+        :return: items from back to front
+        """
+        start = bisect.bisect_right(self.depths, rect.top)
+        end = bisect.bisect_left(self.depths, rect.bottom + self.max_height)
+        bounds = self.bounds
+        collides = rect.colliderect
+
+        return [item for depth in self.depths[start:end] for key, item in self.buckets[depth]
+                if collides(bounds[item])]
+
+    def pick(self, position: tuple[int, int]) -> list:
+        """ Returns all items whose bounds contain a position, the front-most first.
+
+        :param position: position in world coordinates
+        :return: items from front to back
+        """
+        found = []
+        start = bisect.bisect_right(self.depths, position[1])
+        end = bisect.bisect_right(self.depths, position[1] + self.max_height)
+        for depth in reversed(self.depths[start:end]):
+            for key, item in reversed(self.buckets[depth]):
+                if self.bounds[item].collidepoint(position):
+                    found.append(item)
+
+        return found
+
+    def clear(self) -> None:
+        """ Removes all items
+
+        :return: None
+        """
+        self.depths.clear()
+        self.buckets.clear()
+        self.keys.clear()
+        self.bounds.clear()
+        self.max_height = 0
+        self.version += 1
+
+    def __contains__(self, item) -> bool:
+        return item in self.keys
+
+    def __iter__(self):
+        for depth in self.depths:
+            for key, item in self.buckets[depth]:
+                yield item
+
+    def __len__(self) -> int:
+        return len(self.keys)
@@ -0,0 +1,107 @@
+""" This module provides a spatial index of world entities
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import pygame
+
+
+class SpatialIndex(object):
+    def __init__(self, cell_size: int = 256) -> None:
+        """ Creates a uniform grid of buckets that finds items by their bounding rect.
+
+        :param cell_size: width and height of a bucket in pixels
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+        self.bounds = {}
+        self.order = {}
+        # counts every change, so callers can cache query results
+        self.version = 0
+
+    def insert(self, item, rect: pygame.Rect, order=0) -> None:
+        """ Adds an item or updates its bounds.
+
+        :param item: hashable item
+        :param rect: bounding rect of the item
+        :param order: comparable draw order of the item
+        :return: None
+        """
+        if item in self.bounds:
+            self.remove(item)
+
+        rect = pygame.Rect(rect)
+        self.version += 1
+        self.bounds[item] = rect
+        self.order[item] = order
+        for cell in self.__cells(rect):
+            self.cells.setdefault(cell, set()).add(item)
+
+    def remove(self, item) -> None:
+        """ Removes an item if it is part of the index.
+
+        :param item: item
+        :return: None
+        """
+        rect = self.bounds.pop(item, None)
+        if rect is None:
+            return
+
+        del self.order[item]
+        self.version += 1
+        for cell in self.__cells(rect):
+            bucket = self.cells[cell]
+            bucket.discard(item)
+            if not bucket:
+                del self.cells[cell]
+
+    def moved(self, item, rect: pygame.Rect) -> bool:
+        """ Checks if an item has other bounds than stored in the index.
+
+        :param item: item
+        :param rect: current bounding rect of the item
+        :return: True if the bounds changed
+        """
+        return self.bounds.get(item) != rect
+
+    def query(self, rect: pygame.Rect) -> list:
+        """ Returns all items whose bounds intersect the rect, sorted by their draw order.
+
+        :param rect: area to search
+        :return: items in draw order
+        """
+        found = set()
+        for cell in self.__cells(rect):
+            bucket = self.cells.get(cell)
+            if bucket:
+                found.update(bucket)
+
+        return sorted((item for item in found if rect.colliderect(self.bounds[item])), key=self.order.__getitem__)
+
+    def clear(self) -> None:
+        """ Removes all items
+
+        :return: None
+        """
+        self.cells.clear()
+        self.bounds.clear()
+        self.order.clear()
+        self.version += 1
+
+    def __cells(self, rect: pygame.Rect):
+        """ Yields the bucket coordinates covered by a rect.
+
+        :param rect: rect
+        :return: generator of bucket coordinates
+        """
+        size = self.cell_size
+        for cell_x in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cell_y in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield cell_x, cell_y
+
+    def __contains__(self, item) -> bool:
+        return item in self.bounds
+
+    def __len__(self) -> int:
+        return len(self.bounds)
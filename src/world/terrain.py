@@ -0,0 +1,384 @@
+""" This module provides chunked terrain surfaces
+
+:project: resa
+:source: https://github.com/Kanasaru/resa
+:license: CC-BY-SA-4.0
+"""
+import time
+from collections import OrderedDict
+import pygame
+import src.handler.pixelformat as pixelformat
+from src.handler import RESA_AH
+from src.world.camera import zoom_rect
+from src.world.spatial import SpatialIndex
+
+
+class TerrainChunk(object):
+    def __init__(self, rect: pygame.Rect, area: pygame.Rect) -> None:
+        """ Creates a terrain chunk. Its surfaces are rasterized on first draw.
+
+        :param rect: area of the chunk in world coordinates
+        :param area: area of the chunk in pixels of its grid zoom
+        """
+        self.rect = rect
+        self.area = area
+        self.surface = None
+        self.dirty = True
+        self.statics = False
+        # ground without static entities by area on the chunk surface
+        self.patches = {}
+
+
+class GroundPatch(object):
+    def __init__(self, image: pygame.Surface, area: pygame.Rect) -> None:
+        """ Creates a part of the ground layer, so it can be part of blit sequences.
+
+        :param image: surface with the ground
+        :param area: area of the ground on the surface
+        """
+        self.image = image
+        self.area = area
+
+
+class Terrain(object):
+    def __init__(self, grid, chunk_size: int = 512, max_chunks: int = 48) -> None:
+        """ Creates the terrain of a world as fixed-size chunk surfaces. Only visible chunks are
+            rasterized, and least recently drawn chunks of any grid zoom are dropped if more than max_chunks exist.
+            Static entities are baked into the chunks on top of the fields in their isometric order.
+            Every grid zoom has its own chunks, which are rasterized with the frames of its atlas.
+
+        :param grid: grid of the world
+        :param chunk_size: width and height of a chunk in pixels
+        :param max_chunks: maximal number of chunks of all grid zooms, no limit if 0
+        """
+        self.grid = grid
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.fields = SpatialIndex(chunk_size)
+        self.statics = SpatialIndex(chunk_size)
+        self.levels = {}
+        # grid zoom and key of all chunks, least recently drawn first
+        self._recent = OrderedDict()
+        self.zoom = grid.width
+        self.rasterized = 0
+        self.changed = []
+        # counts created and dropped chunks, so callers can cache chunk surfaces
+        self.version = 0
+        self._order = 0
+        # chunk of another grid zoom that is rasterized ahead of time and its remaining steps
+        self._warming = None
+
+    @property
+    def chunks(self) -> OrderedDict:
+        """ Chunks of the current grid zoom, least recently drawn first
+
+        :return: chunks by column and row
+        """
+        return self.__level(self.zoom)
+
+    def __level(self, zoom: int) -> OrderedDict:
+        """ Returns the chunks of a grid zoom, least recently drawn first.
+
+        :param zoom: grid zoom
+        :return: chunks by column and row
+        """
+        chunks = self.levels.get(zoom)
+        if chunks is None:
+            chunks = self.levels[zoom] = OrderedDict()
+        return chunks
+
+    def add(self, field: pygame.sprite.Sprite) -> None:
+        """ Adds a field on top of the terrain and marks its chunks dirty.
+
+        :param field: field sprite
+        :return: None
+        """
+        self._order += 1
+        self.fields.insert(field, field.rect, self._order)
+        self.invalidate(field.rect)
+
+    def remove(self, field: pygame.sprite.Sprite) -> None:
+        """ Removes a field from the terrain and marks its chunks dirty.
+
+        :param field: field sprite
+        :return: None
+        """
+        self.fields.remove(field)
+        self.invalidate(field.rect)
+
+    def add_static(self, sprite: pygame.sprite.Sprite, order: tuple) -> None:
+        """ Adds a static entity to the decoration layer and marks its chunks dirty.
+
+        :param sprite: entity that never changes its appearance
+        :param order: isometric draw order of the entity, see RenderQueue
+        :return: None
+        """
+        if sprite in self.statics:
+            self.invalidate(self.statics.bounds[sprite])
+        self.statics.insert(sprite, sprite.rect, order)
+        self.invalidate(sprite.rect)
+
+    def remove_static(self, sprite: pygame.sprite.Sprite) -> None:
+        """ Removes a static entity from the decoration layer and marks its chunks dirty.
+
+        :param sprite: entity
+        :return: None
+        """
+        if sprite in self.statics:
+            self.invalidate(self.statics.bounds[sprite])
+            self.statics.remove(sprite)
+
+    def clear(self) -> None:
+        """ Removes all fields and chunks
+
+        :return: None
+        """
+        self.fields.clear()
+        self.levels.clear()
+        self._recent.clear()
+        self._warming = None
+        self.version += 1
+
+    def release(self, zoom: int) -> None:
+        """ Drops all chunks of a grid zoom.
+
+        :param zoom: grid zoom
+        :return: None
+        """
+        chunks = self.levels.pop(zoom, None)
+        if chunks is not None:
+            for key in chunks:
+                del self._recent[(zoom, key)]
+            self.version += 1
+        if self._warming is not None and self._warming[0] == zoom:
+            self._warming = None
+
+    def invalidate(self, rect: pygame.Rect) -> None:
+        """ Marks all chunks that intersect the rect dirty.
+
+        :param rect: changed area in world coordinates
+        :return: None
+        """
+        for chunks in self.levels.values():
+            for key, chunk in chunks.items():
+                if chunk.rect.colliderect(rect):
+                    chunk.dirty = True
+        # a chunk rasterized ahead of time starts again with the changed fields
+        if self._warming is not None and self._warming[1].rect.colliderect(rect):
+            self._warming = None
+
+    def draw(self, surface: pygame.Surface, camera) -> None:
+        """ Draws the chunks of the camera zoom that intersect the camera view and rasterizes dirty
+            ones. The areas of rasterized chunks are collected in changed, in pixels of the zoom.
+
+        :param surface: surface of the camera view
+        :param camera: camera
+        :return: None
+        """
+        size = self.chunk_size
+        view = camera.view
+        offset = camera.offset
+        self.changed = []
+        self.zoom = camera.zoom
+        for col in range(view.left // size, (view.right - 1) // size + 1):
+            for row in range(view.top // size, (view.bottom - 1) // size + 1):
+                chunk = self.__chunk((col, row), self.zoom)
+                if chunk.dirty:
+                    self.__rasterize(chunk, self.zoom)
+                    self.changed.append(chunk.area)
+                surface.blit(chunk.surface, chunk.area.move(offset))
+
+        self.__trim()
+
+    def warm(self, zoom: int, rect: pygame.Rect, limit: float) -> bool:
+        """ Rasterizes the chunks of another grid zoom that intersect an area ahead of time, a batch of fields
+            at a time until the time limit is reached. Switching to the zoom then draws the chunks as they are
+            instead of rasterizing all of them in one frame.
+
+        :param zoom: grid zoom
+        :param rect: area in world coordinates
+        :param limit: maximal time in milliseconds
+        :return: True if all chunks of the area are rasterized
+        """
+        deadline = time.perf_counter() + limit / 1000
+        while True:
+            if self._warming is None or self._warming[0] != zoom:
+                chunk = self.__cold_chunk(zoom, rect)
+                if chunk is None:
+                    return True
+                self._warming = (zoom, chunk, self.__raster_steps(chunk, zoom, 64))
+            if time.perf_counter() >= deadline:
+                return False
+            for step in self._warming[2]:
+                if time.perf_counter() >= deadline:
+                    return False
+            self._warming = None
+
+    def __cold_chunk(self, zoom: int, rect: pygame.Rect) -> TerrainChunk | None:
+        """ Returns the first chunk of a grid zoom that intersects an area and is not rasterized yet.
+
+        :param zoom: grid zoom
+        :param rect: area in world coordinates
+        :return: chunk or None if all are rasterized
+        """
+        size = self.chunk_size
+        area = zoom_rect(rect, zoom, self.grid.width)
+        for col in range(area.left // size, (area.right - 1) // size + 1):
+            for row in range(area.top // size, (area.bottom - 1) // size + 1):
+                chunk = self.__chunk((col, row), zoom)
+                if chunk.dirty:
+                    self.__trim()
+                    return chunk
+
+        return None
+
+    def __trim(self) -> None:
+        """ Drops the least recently drawn chunks of all grid zooms if there are more than max_chunks.
+
+        :return: None
+        """
+        recent = self._recent
+        while len(recent) > self.max_chunks > 0:
+            zoom, key = recent.popitem(last=False)[0]
+            chunk = self.levels[zoom].pop(key)
+            if self._warming is not None and self._warming[1] is chunk:
+                self._warming = None
+            self.version += 1
+
+    def ground(self, rect: pygame.Rect) -> list[tuple[tuple[int, int], pygame.Rect, pygame.Rect]]:
+        """ Splits a rect into the parts of the chunks of the current grid zoom it intersects.
+
+        :param rect: area in pixels of the current grid zoom
+        :return: column and row of the chunk, clipped world rect and area on the chunk surface
+        """
+        parts = []
+        size = self.chunk_size
+        for col in range(rect.left // size, (rect.right - 1) // size + 1):
+            for row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                chunk_rect = pygame.Rect(col * size, row * size, size, size)
+                clip = chunk_rect.clip(rect)
+                parts.append(((col, row), clip, clip.move(-chunk_rect.x, -chunk_rect.y)))
+
+        return parts
+
+    def ground_patch(self, cell: tuple[int, int], area: pygame.Rect) -> GroundPatch | None:
+        """ Returns the ground without static entities of an area of a chunk of the current grid zoom if the
+            chunk is up-to-date. Chunks without static entities share their surface, others draw the fields
+            of the area on demand.
+
+        :param cell: column and row of the chunk
+        :param area: area on the chunk surface
+        :return: ground or None
+        """
+        chunk = self.chunks.get(cell)
+        if chunk is None or chunk.dirty:
+            return None
+        key = tuple(area)
+        patch = chunk.patches.get(key)
+        if patch is None:
+            if chunk.statics:
+                patch = GroundPatch(self.__patch(chunk, area), pygame.Rect((0, 0), area.size))
+            else:
+                patch = GroundPatch(chunk.surface, pygame.Rect(area))
+            chunk.patches[key] = patch
+
+        return patch
+
+    def __patch(self, chunk: TerrainChunk, area: pygame.Rect) -> pygame.Surface:
+        """ Draws the fields of an area of a chunk of the current grid zoom.
+
+        :param chunk: chunk
+        :param area: area on the chunk surface
+        :return: surface of the area
+        """
+        surface = pixelformat.surface(area.size)
+        surface.fill((0, 0, 0))
+        zoom = self.zoom
+        base = self.grid.width
+        zoomed = RESA_AH.zoomed(zoom) if zoom != base else {}
+        clip = area.move(chunk.area.topleft)
+        offset = (-clip.x, -clip.y)
+        # rounded scaling may leave out fields at the edges of the area
+        fields = self.fields.query(zoom_rect(clip, base, zoom).inflate(2, 2))
+        surface.blits([(zoomed.get(field.image, field.image), zoom_rect(field.rect, zoom, base).move(offset))
+                       for field in fields], False)
+
+        return surface
+
+    def __chunk(self, key: tuple, zoom: int) -> TerrainChunk:
+        """ Returns a chunk and marks it as recently drawn.
+
+        :param key: column and row of the chunk
+        :param zoom: grid zoom of the chunk
+        :return: chunk
+        """
+        chunks = self.__level(zoom)
+        chunk = chunks.get(key)
+        if chunk is None:
+            col, row = key
+            area = pygame.Rect(col * self.chunk_size, row * self.chunk_size, self.chunk_size, self.chunk_size)
+            # world area of the chunk, rounded outwards
+            base = self.grid.width
+            rect = zoom_rect(area, base, zoom)
+            if zoom != base:
+                rect.inflate_ip(2, 2)
+            chunk = chunks[key] = TerrainChunk(rect, area)
+            self.version += 1
+        else:
+            chunks.move_to_end(key)
+        self._recent[(zoom, key)] = None
+        self._recent.move_to_end((zoom, key))
+
+        return chunk
+
+    def __rasterize(self, chunk: TerrainChunk, zoom: int) -> None:
+        """ Rasterizes a chunk at once.
+
+        :param chunk: chunk
+        :param zoom: grid zoom of the chunk
+        :return: None
+        """
+        if self._warming is not None and self._warming[1] is chunk:
+            self._warming = None
+        for step in self.__raster_steps(chunk, zoom):
+            pass
+
+    def __raster_steps(self, chunk: TerrainChunk, zoom: int, batch: int = 0):
+        """ Draws all fields and then the static entities onto a chunk. Every rasterization creates a new
+            surface, so copies of the old one are never stale. The chunk gets its surface when all steps are done.
+
+        :param chunk: chunk
+        :param zoom: grid zoom of the chunk
+        :param batch: number of fields drawn per step, all fields in one step if 0
+        :return: generator of the steps
+        """
+        surface = pixelformat.surface(chunk.area.size)
+        surface.fill((0, 0, 0))
+
+        offset = (-chunk.area.x, -chunk.area.y)
+        base = self.grid.width
+        # frames of the atlas of the zoom, base zoom frames are used as they are
+        zoomed = RESA_AH.zoomed(zoom) if zoom != base else {}
+        yield
+        fields = self.fields.query(chunk.rect)
+        batch = batch or max(1, len(fields))
+        yield
+        for start in range(0, len(fields), batch):
+            surface.blits([(zoomed.get(field.image, field.image), zoom_rect(field.rect, zoom, base).move(offset))
+                           for field in fields[start:start + batch]], False)
+            yield
+        statics = self.statics.query(chunk.rect)
+        surface.blits([(zoomed.get(sprite.image, sprite.image), zoom_rect(sprite.rect, zoom, base).move(offset))
+                       for sprite in statics], False)
+
+        if chunk.surface is not None:
+            # blit sequences that refer to the old surface are collected again
+            self.version += 1
+        chunk.surface = surface
+        chunk.statics = bool(statics)
+        chunk.patches = {}
+        chunk.dirty = False
+        self.rasterized += 1
+
+    def __len__(self) -> int:
+        return sum(len(chunks) for chunks in self.levels.values())